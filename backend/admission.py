@@ -0,0 +1,154 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+from starlette.requests import Request
+
+T = TypeVar("T")
+
+
+class Overloaded(Exception):
+    def __init__(self, lane: str, retry_after: float):
+        super().__init__(f"{lane} lane is overloaded")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+class Lane:
+    def __init__(self, name: str, priority: int, queue_size: int, deadline: float):
+        self.name = name
+        self.priority = priority  # lower is served first
+        self.queue_size = queue_size
+        self.deadline = deadline
+        self.waiting: Deque[asyncio.Future] = deque()
+        self.counts = {"admitted": 0, "shed": 0, "timed_out": 0, "disconnected": 0}
+
+
+async def wait_for_disconnect(request: Request) -> None:
+    # The body has already been read, so the next message is the disconnect
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+class AdmissionController:
+    """Bounds concurrent LLM-backed requests, serving lanes by priority.
+
+    Requests beyond `concurrency` wait in their lane's bounded queue. A
+    request is shed with Overloaded up front when its lane is full or the
+    estimated wait (requests ahead x average service time / concurrency)
+    exceeds the lane's deadline, and later if it is still queued at the
+    deadline. Work whose client disconnects is cancelled, queued or not.
+    """
+
+    def __init__(self, lanes: List[Lane], concurrency: int):
+        self.lanes: Dict[str, Lane] = {lane.name: lane for lane in lanes}
+        self.order = sorted(lanes, key=lambda lane: lane.priority)
+        self.concurrency = concurrency
+        self.active = 0
+        self.service_time: Optional[float] = None  # EWMA, seconds
+
+    def _ahead(self, lane: Lane) -> int:
+        return sum(len(other.waiting) for other in self.order if other.priority <= lane.priority)
+
+    def estimated_wait(self, lane: Lane) -> float:
+        if self.active < self.concurrency and not self._ahead(lane):
+            return 0.0
+        if self.service_time is None:
+            return 0.0
+        return (self._ahead(lane) + 1) * self.service_time / self.concurrency
+
+    def _retry_after(self, lane: Lane) -> float:
+        return max(1.0, self.estimated_wait(lane) or self.service_time or 1.0)
+
+    async def acquire(self, lane: Lane, request: Optional[Request] = None) -> None:
+        if self.active < self.concurrency and not self._ahead(lane):
+            self.active += 1
+            return
+        if len(lane.waiting) >= lane.queue_size or self.estimated_wait(lane) > lane.deadline:
+            lane.counts["shed"] += 1
+            raise Overloaded(lane.name, self._retry_after(lane))
+
+        granted = asyncio.get_running_loop().create_future()
+        lane.waiting.append(granted)
+        try:
+            await asyncio.wait_for(self._unless_disconnected(request, asyncio.shield(granted)), lane.deadline)
+        except BaseException as e:
+            if granted.done() and not granted.cancelled():
+                # Granted just as we gave up: hand the slot on
+                self.release()
+            else:
+                granted.cancel()
+                if granted in lane.waiting:
+                    lane.waiting.remove(granted)
+            if isinstance(e, asyncio.TimeoutError):
+                lane.counts["timed_out"] += 1
+                raise Overloaded(lane.name, self._retry_after(lane))
+            raise
+
+    def release(self, elapsed: Optional[float] = None) -> None:
+        if elapsed is not None:
+            self.service_time = elapsed if self.service_time is None else 0.8 * self.service_time + 0.2 * elapsed
+        self.active -= 1
+        for lane in self.order:
+            while lane.waiting:
+                granted = lane.waiting.popleft()
+                if not granted.done():
+                    granted.set_result(None)
+                    self.active += 1
+                    return
+
+    async def _unless_disconnected(self, request: Optional[Request], work: Awaitable[T]) -> T:
+        if request is None:
+            return await work
+        task = asyncio.ensure_future(work)
+        watcher = asyncio.ensure_future(wait_for_disconnect(request))
+        try:
+            await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not task.done():
+                task.cancel()
+            watcher.cancel()
+        if not task.done() or task.cancelled():
+            raise ClientDisconnected()
+        return task.result()
+
+    async def run(self, lane_name: str, request: Optional[Request], work: Callable[[], Awaitable[T]]) -> T:
+        """Run `work` once admitted to `lane_name`, cancelling it if the client goes away"""
+        lane = self.lanes[lane_name]
+        try:
+            await self.acquire(lane, request)
+        except ClientDisconnected:
+            lane.counts["disconnected"] += 1
+            raise
+        lane.counts["admitted"] += 1
+        started = time.perf_counter()
+        try:
+            return await self._unless_disconnected(request, work())
+        except ClientDisconnected:
+            lane.counts["disconnected"] += 1
+            raise
+        finally:
+            self.release(time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "concurrency": self.concurrency,
+            "service_time": round(self.service_time, 3) if self.service_time is not None else None,
+            "lanes": {
+                lane.name: dict(lane.counts, waiting=len(lane.waiting), wait_estimate=round(self.estimated_wait(lane), 2))
+                for lane in self.order
+            },
+        }
+
+
+def retry_after_header(error: Overloaded) -> str:
+    return str(math.ceil(error.retry_after))
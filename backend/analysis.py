@@ -0,0 +1,91 @@
+import logging
+from typing import List, Optional
+
+from timing import span
+
+# Bump whenever the prompt or parsing changes; stored verifications carrying
+# an older version are picked up by reverify.py
+PROMPT_VERSION = "1"
+
+SYSTEM_MESSAGE = """You are an expert fact-checker and fake news detector. Analyze the given news content and provide:
+1. Classification: Real, Fake, or Misleading
+2. Confidence score (0-100)
+3. Evidence and reasoning for your classification
+
+Provide your response in this exact format:
+CLASSIFICATION: [Real/Fake/Misleading]
+CONFIDENCE: [0-100]
+EVIDENCE: [Your detailed reasoning and evidence]"""
+
+COMPLETION_PARAMS = {"temperature": 0.7, "max_tokens": 500}
+
+
+def build_messages(content: str, url: Optional[str] = None) -> List[dict]:
+    prompt = f"Analyze this news content for authenticity:\n\n{content}"
+    if url:
+        prompt += f"\n\nSource URL: {url}"
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_analysis(response_text: str) -> dict:
+    response_text = response_text.strip()
+    
+    # Parse the response
+    lines = response_text.split('\n')
+    classification = "Misleading"
+    confidence = 50.0
+    evidence = "Unable to fully analyze the content."
+    
+    for line in lines:
+        if line.startswith("CLASSIFICATION:"):
+            classification = line.split(":", 1)[1].strip()
+        elif line.startswith("CONFIDENCE:"):
+            try:
+                confidence = float(line.split(":", 1)[1].strip())
+            except:
+                confidence = 50.0
+        elif line.startswith("EVIDENCE:"):
+            evidence = line.split(":", 1)[1].strip()
+    
+    # If evidence wasn't parsed correctly, use the whole response
+    if evidence == "Unable to fully analyze the content." and len(response_text) > 50:
+        parts = response_text.split("EVIDENCE:", 1)
+        if len(parts) > 1:
+            evidence = parts[1].strip()
+        else:
+            evidence = response_text
+    
+    return {
+        "result": classification,
+        "confidence": confidence,
+        "evidence": evidence
+    }
+
+
+async def run_analysis(content: str, url: Optional[str], llm) -> dict:
+    """One LLM analysis; raises on any failure"""
+    if llm is None:
+        raise Exception("OpenAI API key not configured")
+    
+    with span("llm"):
+        response = await llm.complete(messages=build_messages(content, url), **COMPLETION_PARAMS)
+    
+    with span("parse"):
+        return parse_analysis(response.choices[0].message.content)
+
+
+async def analyze_news_with_ai(content: str, url: Optional[str] = None, llm=None) -> dict:
+    """Analyze news content using OpenAI GPT-4o-mini for fake news detection"""
+    try:
+        return await run_analysis(content, url, llm)
+    except Exception as e:
+        logging.error(f"AI analysis error: {str(e)}")
+        return {
+            "result": "Misleading",
+            "confidence": 0.0,
+            "evidence": f"Analysis failed: {str(e)}",
+            "failed": True
+        }
@@ -0,0 +1,185 @@
+"""Retention for the verifications collection.
+
+Verifications older than the hot window are moved by a background Archiver
+to one collection per month (verifications_archive_YYYY_MM), keeping the
+hot collection and its indexes small. History reads that run out of hot
+rows continue into the archive partitions, newest first.
+
+Low-value rows (failed analyses) get an expires_at date and are removed by
+a TTL index wherever they live.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Optional
+
+from pymongo import ReplaceOne
+from pymongo.errors import DuplicateKeyError
+
+from bodies import BODY_FIELDS, ROW_PROJECTION, collect_orphan_bodies, ensure_search_indexes
+
+logger = logging.getLogger(__name__)
+
+HOT_COLLECTION = "verifications"
+ARCHIVE_PREFIX = "verifications_archive_"
+# Trending reads the last 24h from the hot collection
+MIN_HOT_DAYS = 2
+# How often the archiver also deletes bodies no row references
+ORPHAN_SWEEP_INTERVAL = 86400
+
+
+def archive_name(timestamp: str) -> str:
+    return f"{ARCHIVE_PREFIX}{timestamp[:4]}_{timestamp[5:7]}"
+
+
+def _overlaps(name: str, query: dict) -> bool:
+    # Stored timestamps are UTC isoformat strings, so months compare as text
+    month = name[len(ARCHIVE_PREFIX):].replace("_", "-")
+    timestamp = query.get("timestamp") or {}
+    start = timestamp.get("$gte") or timestamp.get("$gt")
+    end = timestamp.get("$lte") or timestamp.get("$lt")
+    return not (start and start[:7] > month) and not (end and end[:7] < month)
+
+
+async def archive_names(db, query: Optional[dict] = None) -> List[str]:
+    """Archive partitions, newest first, that can hold rows matching `query`"""
+    names = [name for name in await db.list_collection_names() if name.startswith(ARCHIVE_PREFIX)]
+    return sorted((name for name in names if _overlaps(name, query or {})), reverse=True)
+
+
+def low_value_expiry(ttl_days: float) -> Optional[datetime]:
+    return datetime.now(timezone.utc) + timedelta(days=ttl_days) if ttl_days > 0 else None
+
+
+async def ensure_body_ref_indexes(collection) -> None:
+    # Lets collect_orphan_bodies look up the rows referencing a body
+    for hash_field in BODY_FIELDS.values():
+        await collection.create_index([(hash_field, 1)], sparse=True)
+
+
+async def ensure_partition_indexes(collection) -> None:
+    await collection.create_index([("timestamp", -1)])
+    await collection.create_index([("user_id", 1), ("timestamp", -1)])
+    await collection.create_index([("expires_at", 1)], expireAfterSeconds=0)
+    await ensure_body_ref_indexes(collection)
+    await ensure_search_indexes(collection)
+
+
+async def find_history(db, query: dict, skip: int, limit: int) -> List[dict]:
+    """Newest-first page over the hot collection, then the archive partitions"""
+    rows = []
+    seen = set()
+    remaining_skip = skip
+    partitions = [HOT_COLLECTION]
+    archives_listed = False
+    while partitions and len(rows) < limit:
+        collection = db[partitions.pop(0)]
+        offset = remaining_skip
+        while True:
+            wanted = limit - len(rows)
+            batch = await collection.find(query, ROW_PROJECTION).sort("timestamp", -1).skip(
+                offset
+            ).limit(wanted).to_list(wanted)
+            if remaining_skip:
+                # Carry over whatever part of the skip this partition could not absorb
+                remaining_skip = 0 if batch else max(0, remaining_skip - await collection.count_documents(query))
+            offset += len(batch)
+            # A row being archived right now can briefly exist in both
+            # collections; read on past its copy so the page stays full
+            for row in batch:
+                if row.get('id') not in seen:
+                    seen.add(row.get('id'))
+                    rows.append(row)
+            if len(batch) < wanted or len(rows) >= limit:
+                break
+        if not archives_listed:
+            partitions += await archive_names(db, query)
+            archives_listed = True
+    return rows
+
+
+async def iter_history(db, query: dict, batch_size: int) -> AsyncIterator[dict]:
+    """Oldest-first stream over the archive partitions, then the hot collection"""
+    for name in [*reversed(await archive_names(db, query)), HOT_COLLECTION]:
+        cursor = db[name].find(query, ROW_PROJECTION).sort("timestamp", 1).batch_size(batch_size)
+        try:
+            async for document in cursor:
+                yield document
+        finally:
+            await cursor.close()
+
+
+class Archiver:
+    """Moves verifications older than `hot_days` into monthly partitions.
+
+    Rows are copied to their partition before being deleted from the hot
+    collection, oldest first, so an interrupted move is simply repeated.
+    Failed analyses stay hot, where reverify.py picks them up and their
+    expiry applies. Workers share the job through a lease in the jobs
+    collection.
+    """
+
+    def __init__(self, db, hot_days: float, batch_size: int = 1000):
+        self.db = db
+        self.hot_days = max(hot_days, MIN_HOT_DAYS)
+        self.batch_size = batch_size
+        self._indexed = set()
+        self._swept_at: Optional[float] = None
+
+    async def acquire_lease(self, seconds: float) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.db.jobs.update_one(
+                {"_id": "archiver", "lease_until": {"$lt": now}},
+                {"$set": {"lease_until": now + timedelta(seconds=seconds), "holder": os.getpid()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Another worker holds an unexpired lease
+            return False
+        return True
+
+    async def archive_once(self) -> int:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.hot_days)).isoformat()
+        moved = 0
+        while True:
+            chunk = await self.db.verifications.find(
+                {"timestamp": {"$lt": cutoff}, "analysis_failed": {"$ne": True}}
+            ).sort(
+                "timestamp", 1
+            ).limit(self.batch_size).to_list(self.batch_size)
+            if not chunk:
+                return moved
+            by_partition = defaultdict(list)
+            for document in chunk:
+                by_partition[archive_name(document['timestamp'])].append(document)
+            for name, documents in by_partition.items():
+                if name not in self._indexed:
+                    await ensure_partition_indexes(self.db[name])
+                    self._indexed.add(name)
+                await self.db[name].bulk_write(
+                    [ReplaceOne({"_id": document['_id']}, document, upsert=True) for document in documents],
+                    ordered=False
+                )
+            await self.db.verifications.delete_many({"_id": {"$in": [document['_id'] for document in chunk]}})
+            moved += len(chunk)
+
+    async def run(self, interval: float) -> None:
+        while True:
+            try:
+                if await self.acquire_lease(interval):
+                    moved = await self.archive_once()
+                    if moved:
+                        logger.info(f"Archived {moved} verifications")
+                    if self._swept_at is None or time.monotonic() - self._swept_at >= ORPHAN_SWEEP_INTERVAL:
+                        collections = [HOT_COLLECTION, *await archive_names(self.db)]
+                        deleted = await collect_orphan_bodies(self.db, collections)
+                        self._swept_at = time.monotonic()
+                        if deleted:
+                            logger.info(f"Deleted {deleted} orphaned bodies")
+            except Exception as e:
+                logger.warning(f"Archiving failed: {str(e)}")
+            await asyncio.sleep(interval)
@@ -0,0 +1,327 @@
+"""Content-addressed storage for verification content and evidence.
+
+Verification rows keep `content_hash` and `evidence_hash`; the text lives
+once per distinct value in the bodies collection, so a viral article
+submitted thousands of times is stored once. Bodies above a size threshold
+can be zstd-compressed (BODY_COMPRESSION=zstd).
+
+Each body also keeps `terms`, the distinct words of its text, under the
+body_search text index, so compressed bodies are searchable and the words
+are stored once per body. Searches resolve matching bodies to one user's
+rows through (user_id, content_hash) and (user_id, evidence_hash) indexes.
+
+Rows written before bodies moved out still carry the text inline and are
+matched by the per-user user_history_text index. Running this module moves
+them over, gives older bodies their terms, drops the per-row search words
+an earlier version stored and deletes bodies no row references any more:
+    python bodies.py
+"""
+import asyncio
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List
+
+from bson import Binary
+from pymongo import UpdateOne
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, bodies are then stored as text
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+BODY_FIELDS = {"content": "content_hash", "evidence": "evidence_hash"}
+# Per-row search words stored by an earlier version, dropped by main()
+LEGACY_SEARCH_FIELDS = {"content": "search_content", "evidence": "search_evidence"}
+# Weight of a text match per field
+SEARCH_WEIGHTS = {"content": 2, "evidence": 1}
+ROW_TEXT_INDEX = "user_history_text"
+BODY_SEARCH_INDEX = "body_search"
+# Text indexes replaced by the ones above (a collection holds one text index)
+OLD_ROW_TEXT_INDEXES = ("user_history_search",)
+OLD_BODY_TEXT_INDEXES = ("body_text",)
+# Distinct words kept per body; enough for any realistic article
+SEARCH_TERMS_LIMIT = 2000
+ROW_PROJECTION = {"_id": 0, **{field: 0 for field in LEGACY_SEARCH_FIELDS.values()}}
+LOOKUP_BATCH_SIZE = 500
+# Bodies stored more recently may belong to a row still being written
+ORPHAN_GRACE = timedelta(hours=1)
+WORD_RE = re.compile(r"\w+")
+
+
+def body_key(kind: str, text: str) -> str:
+    return f"{kind[0]}{hashlib.blake2b(text.encode(), digest_size=16).hexdigest()}"
+
+
+def search_terms(text: str) -> str:
+    """Distinct lowercased words of `text`, in order of first appearance"""
+    terms = dict.fromkeys(WORD_RE.findall(text.lower()))
+    return " ".join(list(terms)[:SEARCH_TERMS_LIMIT])
+
+
+def decode_body(body: dict) -> str:
+    if "zstd" in body:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read compressed bodies")
+        return zstandard.ZstdDecompressor().decompress(body["zstd"]).decode()
+    return body.get("text", "")
+
+
+class BodyStore:
+    """Writes bodies; readers only need hydrate()"""
+
+    def __init__(self, db, compression: str = "", compress_min_size: int = 2048, level: int = 3):
+        if compression not in ("", "zstd"):
+            raise ValueError(f"Unknown body compression: {compression}")
+        if compression and zstandard is None:
+            logger.warning("zstandard is not installed, storing bodies uncompressed")
+            compression = ""
+        self.db = db
+        self.compressor = zstandard.ZstdCompressor(level=level) if compression else None
+        self.compress_min_size = compress_min_size
+
+    def encode(self, kind: str, text: str) -> dict:
+        data = text.encode()
+        body = {"kind": kind, "size": len(data), "terms": search_terms(text)}
+        if self.compressor is not None and len(data) >= self.compress_min_size:
+            body["zstd"] = Binary(self.compressor.compress(data))
+        else:
+            body["text"] = text
+        return body
+
+    async def put(self, verifications: Iterable[dict]) -> List[dict]:
+        """Store the bodies of `verifications`, returning rows that reference them"""
+        rows = []
+        bodies = {}
+        for verification in verifications:
+            row = dict(verification)
+            for field, hash_field in BODY_FIELDS.items():
+                if field in row:
+                    text = row.pop(field) or ""
+                    key = body_key(field, text)
+                    bodies.setdefault(key, (field, text))
+                    row[hash_field] = key
+            rows.append(row)
+        if bodies:
+            now = datetime.now(timezone.utc)
+            # stored_at is refreshed on reuse, so the orphan sweep spares
+            # bodies whose rows are about to be written
+            await self.db.bodies.bulk_write([
+                UpdateOne(
+                    {"_id": key},
+                    {"$setOnInsert": self.encode(kind, text), "$set": {"stored_at": now}},
+                    upsert=True
+                )
+                for key, (kind, text) in bodies.items()
+            ], ordered=False)
+        return rows
+
+    async def store(self, verification: dict) -> dict:
+        return (await self.put([verification]))[0]
+
+
+async def load_bodies(db, keys: Iterable[str]) -> Dict[str, str]:
+    keys = list(set(keys))
+    texts = {}
+    for i in range(0, len(keys), LOOKUP_BATCH_SIZE):
+        async for body in db.bodies.find({"_id": {"$in": keys[i:i + LOOKUP_BATCH_SIZE]}}):
+            texts[body["_id"]] = decode_body(body)
+    return texts
+
+
+async def hydrate(db, rows: List[dict], fields: Iterable[str] = BODY_FIELDS) -> List[dict]:
+    """Put content/evidence text back into rows, in place, with batched $in lookups"""
+    fields = list(fields)
+    texts = await load_bodies(db, (
+        row[BODY_FIELDS[field]] for row in rows for field in fields if BODY_FIELDS[field] in row
+    ))
+    for row in rows:
+        for field in fields:
+            key = row.pop(BODY_FIELDS[field], None)
+            if key is not None:
+                row[field] = texts.get(key, "")
+        for hidden_field in (*BODY_FIELDS.values(), *LEGACY_SEARCH_FIELDS.values()):
+            row.pop(hidden_field, None)
+    return rows
+
+
+async def _drop_indexes(collection, names: Iterable[str]) -> None:
+    existing = await collection.index_information()
+    for name in names:
+        if name in existing:
+            await collection.drop_index(name)
+
+
+async def ensure_search_indexes(collection) -> None:
+    """Indexes a verifications collection needs for text_search"""
+    await _drop_indexes(collection, OLD_ROW_TEXT_INDEXES)
+    # The user_id prefix scopes each search to one user's entries
+    await collection.create_index(
+        [("user_id", 1), *((field, "text") for field in BODY_FIELDS)],
+        weights=SEARCH_WEIGHTS,
+        name=ROW_TEXT_INDEX
+    )
+    for hash_field in BODY_FIELDS.values():
+        await collection.create_index([("user_id", 1), (hash_field, 1)])
+
+
+async def ensure_body_search_index(bodies) -> None:
+    await _drop_indexes(bodies, OLD_BODY_TEXT_INDEXES)
+    await bodies.create_index([("terms", "text")], name=BODY_SEARCH_INDEX)
+
+
+async def text_search(db, query: dict, q: str, limit: int, collection: str = "verifications") -> List[dict]:
+    """Up to `limit` rows matching `query` whose text matches `q`, best first.
+
+    `query` must pin user_id. Bodies matching `q` are read best first, a
+    batch at a time, and resolved to the user's rows until `limit` rows are
+    found; rows with inline text are matched directly.
+    """
+    found: Dict[str, dict] = {}
+
+    def add(row: dict, score: float) -> None:
+        existing = found.setdefault(row["id"], dict(row, score=0.0))
+        existing["score"] += score
+
+    async for row in db[collection].find(
+        {**query, "$text": {"$search": q}},
+        {**ROW_PROJECTION, "score": {"$meta": "textScore"}}
+    ).sort([("score", {"$meta": "textScore"})]).limit(limit):
+        add(row, row.pop("score"))
+
+    async def resolve(scores: Dict[str, float]) -> None:
+        clauses = []
+        for field, hash_field in BODY_FIELDS.items():
+            keys = [key for key in scores if key[0] == field[0]]
+            if keys:
+                clauses.append({hash_field: {"$in": keys}})
+        async for row in db[collection].find({**query, "$or": clauses}, ROW_PROJECTION):
+            add(row, sum(
+                weight * scores.get(row.get(BODY_FIELDS[field]), 0.0) for field, weight in SEARCH_WEIGHTS.items()
+            ))
+
+    cursor = db.bodies.find(
+        {"$text": {"$search": q}},
+        {"_id": 1, "score": {"$meta": "textScore"}}
+    ).sort([("score", {"$meta": "textScore"})]).batch_size(LOOKUP_BATCH_SIZE)
+    batch: Dict[str, float] = {}
+    try:
+        async for body in cursor:
+            batch[body["_id"]] = body["score"]
+            if len(batch) >= LOOKUP_BATCH_SIZE:
+                await resolve(batch)
+                batch = {}
+                if len(found) >= limit:
+                    break
+        if batch:
+            await resolve(batch)
+    finally:
+        await cursor.close()
+    ranked = sorted(found.values(), key=lambda row: (row["score"], row.get("timestamp", "")), reverse=True)
+    return ranked[:limit]
+
+
+async def migrate_inline_bodies(db, store: BodyStore, batch_size: int = 500) -> int:
+    """Move rows that still carry content/evidence inline over to bodies"""
+    moved = 0
+    query = {"content_hash": {"$exists": False}, "content": {"$exists": True}}
+    while True:
+        chunk = await db.verifications.find(query, {"_id": 1, "content": 1, "evidence": 1}).limit(
+            batch_size
+        ).to_list(batch_size)
+        if not chunk:
+            return moved
+        rows = await store.put(chunk)
+        await db.verifications.bulk_write([
+            UpdateOne(
+                {"_id": row["_id"]},
+                {
+                    "$set": {field: row[field] for field in BODY_FIELDS.values() if field in row},
+                    "$unset": {field: "" for field in BODY_FIELDS},
+                }
+            )
+            for row in rows
+        ], ordered=False)
+        moved += len(rows)
+        logger.info(f"Moved bodies of {moved} verifications")
+
+
+async def backfill_body_terms(db, batch_size: int = LOOKUP_BATCH_SIZE) -> int:
+    """Add the search words to bodies stored before they existed"""
+    filled = 0
+    while True:
+        chunk = await db.bodies.find({"terms": {"$exists": False}}).limit(batch_size).to_list(batch_size)
+        if not chunk:
+            return filled
+        await db.bodies.bulk_write([
+            UpdateOne({"_id": body["_id"]}, {"$set": {"terms": search_terms(decode_body(body))}})
+            for body in chunk
+        ], ordered=False)
+        filled += len(chunk)
+        logger.info(f"Added search words to {filled} bodies")
+
+
+async def drop_row_search_words(db, collection: str) -> int:
+    result = await db[collection].update_many(
+        {"$or": [{field: {"$exists": True}} for field in LEGACY_SEARCH_FIELDS.values()]},
+        {"$unset": {field: "" for field in LEGACY_SEARCH_FIELDS.values()}}
+    )
+    return result.modified_count
+
+
+async def collect_orphan_bodies(db, collections: List[str], batch_size: int = LOOKUP_BATCH_SIZE) -> int:
+    """Delete bodies that no row in `collections` references any more.
+
+    Failed rows expiring and reverify rewriting evidence leave bodies
+    behind. Bodies stored within ORPHAN_GRACE are kept, as their row may
+    still be on its way.
+    """
+    cutoff = datetime.now(timezone.utc) - ORPHAN_GRACE
+    stale = {"$or": [{"stored_at": {"$lt": cutoff}}, {"stored_at": {"$exists": False}}]}
+    deleted = 0
+    last_key = ""
+    while True:
+        keys = [body["_id"] async for body in db.bodies.find(
+            {"_id": {"$gt": last_key}, **stale},
+            {"_id": 1}
+        ).sort("_id", 1).limit(batch_size)]
+        if not keys:
+            return deleted
+        last_key = keys[-1]
+        referenced = set()
+        for name in collections:
+            for hash_field in BODY_FIELDS.values():
+                referenced.update(await db[name].distinct(hash_field, {hash_field: {"$in": keys}}))
+        orphans = [key for key in keys if key not in referenced]
+        if orphans:
+            # A body put again since the scan has a fresh stored_at and is kept
+            deleted += (await db.bodies.delete_many({"_id": {"$in": orphans}, **stale})).deleted_count
+
+
+async def main() -> None:
+    from archive import HOT_COLLECTION, archive_names, ensure_partition_indexes
+    from resources import Resources
+    from settings import Settings
+
+    resources = Resources(Settings.from_env())
+    await resources.open()
+    try:
+        db = resources.db
+        logger.info(f"{await migrate_inline_bodies(db, resources.bodies)} verifications moved to bodies")
+        logger.info(f"{await backfill_body_terms(db)} bodies given search words")
+        collections = [HOT_COLLECTION, *await archive_names(db)]
+        for name in collections:
+            if name != HOT_COLLECTION:
+                await ensure_partition_indexes(db[name])
+            logger.info(f"{await drop_row_search_words(db, name)} rows of {name} lost their copied search words")
+        logger.info(f"{await collect_orphan_bodies(db, collections)} orphaned bodies deleted")
+    finally:
+        await resources.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
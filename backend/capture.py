@@ -0,0 +1,139 @@
+"""Capture of live traffic for replay with traffic_replay.py.
+
+Each sampled request is appended to a JSONL file as one object: arrival time,
+method, path, sanitized query and JSON body, whether it carried a bearer
+token, the endpoint that served it, status, response size and duration.
+Credentials, emails and API keys never reach the file.
+"""
+import hashlib
+import os
+import random
+import time
+from typing import Any, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode
+
+import orjson
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REDACTED = "<redacted>"
+# Every password becomes the same one that passes the strength rules, so
+# replayed registrations and logins keep working
+REPLAY_PASSWORD = "Replay-Passw0rd!"
+# Secrets and personal details
+PRIVATE_FIELDS = {"token", "access_token", "refresh_token", "apikey", "api_key", "secret", "name"}
+SECRET_PARAMS = {"apikey", "api_key", "key", "token", "access_token", "password"}
+KEPT_HEADERS = ("content-type", "accept", "accept-encoding", "if-none-match")
+
+
+def pseudonymize_email(email: str) -> str:
+    # Stable per address, so a register/login/verify sequence still lines up
+    digest = hashlib.blake2b(email.strip().lower().encode(), digest_size=6).hexdigest()
+    return f"user-{digest}@example.com"
+
+
+def sanitize(value: Any) -> Any:
+    if isinstance(value, dict):
+        cleaned = {}
+        for key, item in value.items():
+            lowered = str(key).lower()
+            if lowered == "password":
+                cleaned[key] = REPLAY_PASSWORD
+            elif lowered in PRIVATE_FIELDS:
+                cleaned[key] = REDACTED
+            elif lowered == "email" and isinstance(item, str):
+                cleaned[key] = pseudonymize_email(item)
+            else:
+                cleaned[key] = sanitize(item)
+        return cleaned
+    if isinstance(value, list):
+        return [sanitize(item) for item in value]
+    return value
+
+
+def sanitize_query(query_string: bytes) -> str:
+    pairs = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    return urlencode([(key, REDACTED if key.lower() in SECRET_PARAMS else value) for key, value in pairs])
+
+
+class CaptureMiddleware:
+    """Appends a sanitized record of sampled requests to `path`.
+
+    Lines are written with one O_APPEND write each, so several workers can
+    share a file. Streaming responses (server-sent events) are skipped, and
+    bodies over `max_body` bytes are recorded by size only.
+    """
+
+    def __init__(self, app: ASGIApp, path: str, sample_rate: float = 1.0, max_body: int = 65536,
+                 exclude: Iterable[str] = ("/api/health",)) -> None:
+        self.app = app
+        self.path = os.path.abspath(path)
+        self.sample_rate = sample_rate
+        self.max_body = max_body
+        self.exclude = tuple(exclude)
+        self._fd: Optional[int] = None
+
+    def _write(self, record: dict) -> None:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        os.write(self._fd, orjson.dumps(record) + b"\n")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"].startswith(self.exclude)
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        arrived = time.time()
+        started = time.perf_counter()
+        headers = Headers(scope=scope)
+        body = bytearray()
+        body_size = 0
+        response = {"status": None, "bytes": 0, "streaming": False}
+
+        async def capture_receive() -> Message:
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                if body_size <= self.max_body:
+                    body.extend(chunk)
+            return message
+
+        async def capture_send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                response["streaming"] = content_type.startswith("text/event-stream")
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            if not response["streaming"]:
+                endpoint = scope.get("endpoint")
+                record = {
+                    "ts": arrived,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": sanitize_query(scope.get("query_string", b"")),
+                    "headers": {name: headers[name] for name in KEPT_HEADERS if name in headers},
+                    "auth": headers.get("authorization", "").lower().startswith("bearer "),
+                    "endpoint": getattr(endpoint, "__name__", None),
+                    "status": response["status"],
+                    "response_bytes": response["bytes"],
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "body_bytes": body_size,
+                }
+                if body and body_size <= self.max_body:
+                    try:
+                        record["json"] = sanitize(orjson.loads(bytes(body)))
+                    except orjson.JSONDecodeError:
+                        pass  # Non-JSON bodies are recorded by size only
+                self._write(record)
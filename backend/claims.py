@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import logging
+import re
+import unicodedata
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from analysis import parse_analysis
+from timing import span
+
+# Part of every cache key: bump when the claim prompts change
+CLAIM_PROMPT_VERSION = "1"
+
+EXTRACT_MESSAGE = """You extract checkable factual claims from news content.
+List each distinct factual claim as one short, self-contained sentence on its own line.
+Resolve pronouns so every claim stands alone. Skip opinions, questions and filler.
+Output only the claims, one per line, with no numbering. Output at most {max_claims} claims."""
+
+CLAIM_MESSAGE = """You are an expert fact-checker. Assess the single factual claim you are given.
+
+Provide your response in this exact format:
+CLASSIFICATION: [Real/Fake/Misleading]
+CONFIDENCE: [0-100]
+EVIDENCE: [Your concise reasoning and evidence]"""
+
+RESULTS = ("Real", "Fake", "Misleading")
+CONFIDENCE_RE = re.compile(r"^CONFIDENCE:\s*\d", re.MULTILINE)
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+NON_WORD_RE = re.compile(r"[^\w\s]+")
+
+
+def normalize_claim(claim: str) -> str:
+    text = unicodedata.normalize("NFKC", claim).lower()
+    return " ".join(NON_WORD_RE.sub(" ", text).split())
+
+
+def claim_hash(claim: str) -> str:
+    return hashlib.sha256(f"{CLAIM_PROMPT_VERSION}:{normalize_claim(claim)}".encode()).hexdigest()
+
+
+def split_sentences(content: str, max_claims: int) -> List[str]:
+    """Fallback claim extraction when the LLM extraction is unavailable"""
+    sentences = [s.strip() for s in SENTENCE_RE.split(content) if len(s.split()) >= 4]
+    return sentences[:max_claims]
+
+
+def aggregate(claims: List[dict]) -> dict:
+    """Combine claim verdicts into one article verdict.
+
+    Fake when claims judged Fake carry at least half of the total confidence,
+    Real when every claim is Real, Misleading otherwise.
+    """
+    weights: Dict[str, float] = {}
+    for claim in claims:
+        weights[claim['result']] = weights.get(claim['result'], 0.0) + max(claim['confidence'], 1.0)
+    total = sum(weights.values())
+    if weights.get("Fake", 0.0) * 2 >= total:
+        result = "Fake"
+    elif set(weights) == {"Real"}:
+        result = "Real"
+    else:
+        result = "Misleading"
+
+    agreeing = [claim['confidence'] for claim in claims if claim['result'] == result] or [
+        claim['confidence'] for claim in claims
+    ]
+    evidence = "\n".join(
+        f"- [{claim['result']}, {claim['confidence']:.0f}%] {claim['claim']}: {claim['evidence']}"
+        for claim in claims
+    )
+    return {
+        "result": result,
+        "confidence": round(sum(agreeing) / len(agreeing), 1),
+        "evidence": evidence,
+    }
+
+
+class ClaimVerifier:
+    """Verifies an article claim by claim, caching each verdict by claim hash.
+
+    Cached verdicts live in the claim_verdicts collection, which expires them
+    through a TTL index. An article that restates already-checked claims
+    only pays for LLM calls on the claims that are new.
+    """
+
+    def __init__(self, db, llm, max_claims: int = 8, concurrency: int = 4, min_words: int = 80):
+        self.db = db
+        self.llm = llm
+        self.max_claims = max_claims
+        self.min_words = min_words
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.counts = {"articles": 0, "claims": 0, "cache_hits": 0, "llm_checks": 0}
+
+    async def extract(self, content: str) -> List[str]:
+        try:
+            with span("claim_extract"):
+                response = await self.llm.complete(
+                    messages=[
+                        {"role": "system", "content": EXTRACT_MESSAGE.format(max_claims=self.max_claims)},
+                        {"role": "user", "content": content}
+                    ],
+                    temperature=0,
+                    max_tokens=400
+                )
+            lines = response.choices[0].message.content.strip().split("\n")
+            claims = [BULLET_RE.sub("", line).strip() for line in lines]
+            claims = [claim for claim in claims if claim]
+        except Exception as e:
+            logging.error(f"Claim extraction error: {str(e)}")
+            claims = split_sentences(content, self.max_claims)
+
+        # Drop restatements within the same article
+        unique = {}
+        for claim in claims:
+            unique.setdefault(claim_hash(claim), claim)
+        return list(unique.values())[:self.max_claims]
+
+    async def _check(self, key: str, claim: str) -> dict:
+        async with self.semaphore:
+            response = await self.llm.complete(
+                messages=[
+                    {"role": "system", "content": CLAIM_MESSAGE},
+                    {"role": "user", "content": claim}
+                ],
+                temperature=0.2,
+                max_tokens=250
+            )
+        text = response.choices[0].message.content
+        verdict = parse_analysis(text)
+        # parse_analysis falls back to Misleading/50 on replies it cannot
+        # read; those answer this article but are not reused
+        if verdict['result'] not in RESULTS or not CONFIDENCE_RE.search(text.strip()):
+            return verdict
+        await self.db.claim_verdicts.update_one(
+            {"_id": key},
+            {"$set": dict(verdict, claim=claim, created_at=datetime.now(timezone.utc))},
+            upsert=True
+        )
+        return verdict
+
+    async def _check_once(self, key: str, claim: str) -> dict:
+        # Concurrent articles sharing a new claim wait on one LLM call
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._check(key, claim))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def analyze(self, content: str, url: Optional[str] = None) -> Optional[dict]:
+        """Article verdict with per-claim details, or None when the content is
+        too short to decompose or no claims are found"""
+        if len(content.split()) < self.min_words:
+            return None
+        claims = await self.extract(content)
+        if not claims:
+            return None
+        keys = [claim_hash(claim) for claim in claims]
+
+        with span("claim_cache"):
+            cached = {
+                doc['_id']: doc
+                async for doc in self.db.claim_verdicts.find({"_id": {"$in": keys}})
+            }
+        misses = [(key, claim) for key, claim in zip(keys, claims) if key not in cached]
+        with span("claim_checks"):
+            checked = await asyncio.gather(*(self._check_once(key, claim) for key, claim in misses))
+        verdicts = dict(cached)
+        verdicts.update({key: verdict for (key, _), verdict in zip(misses, checked)})
+
+        self.counts["articles"] += 1
+        self.counts["claims"] += len(claims)
+        self.counts["cache_hits"] += len(cached)
+        self.counts["llm_checks"] += len(misses)
+
+        claim_results = [
+            {
+                "claim": claim,
+                "result": verdicts[key]['result'],
+                "confidence": verdicts[key]['confidence'],
+                "evidence": verdicts[key]['evidence'],
+                "cached": key in cached,
+            }
+            for key, claim in zip(keys, claims)
+        ]
+        return dict(aggregate(claim_results), claims=claim_results)
@@ -0,0 +1,74 @@
+import csv
+import io
+from typing import AsyncIterator, Literal
+
+from fastapi.responses import StreamingResponse
+
+from archive import iter_history
+from bodies import hydrate
+from responses import dumps
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_FIELDS = ["id", "user_id", "timestamp", "result", "confidence", "url", "content", "evidence"]
+EXPORT_BATCH_SIZE = 500
+CHUNK_SIZE = 64 * 1024
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def hydrated_batches(db, documents: AsyncIterator[dict]) -> AsyncIterator[dict]:
+    """Documents with their bodies, fetched one batch at a time"""
+    batch = []
+    async for document in documents:
+        batch.append(document)
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            for row in await hydrate(db, batch):
+                yield row
+            batch = []
+    for row in await hydrate(db, batch):
+        yield row
+
+
+async def export_chunks(db, documents: AsyncIterator[dict], fmt: ExportFormat) -> AsyncIterator[bytes]:
+    """Encode documents into ~64 KiB chunks.
+
+    Cursors are read one batch at a time and every chunk is awaited by the
+    response before the next is built, so memory stays flat and a slow client
+    simply pauses the cursor.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    chunk = bytearray()
+    if fmt == "csv":
+        writer.writeheader()
+    try:
+        async for document in hydrated_batches(db, documents):
+            if fmt == "csv":
+                writer.writerow(document)
+                chunk += buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                chunk += dumps({field: document.get(field) for field in EXPORT_FIELDS})
+                chunk += b"\n"
+            if len(chunk) >= CHUNK_SIZE:
+                yield bytes(chunk)
+                chunk.clear()
+        if fmt == "csv" and buffer.tell():
+            chunk += buffer.getvalue().encode()
+        if chunk:
+            yield bytes(chunk)
+    finally:
+        await documents.aclose()
+
+
+def export_response(db, query: dict, fmt: ExportFormat, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        export_chunks(db, iter_history(db, query, EXPORT_BATCH_SIZE), fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
@@ -0,0 +1,162 @@
+"""Canned answers for the chatbot's most common questions.
+
+Incoming messages are matched against example phrasings of each FAQ intent
+with TF-IDF cosine similarity; a close enough match that also covers the
+words of one of the intent's examples, and uses no words foreign to the
+intent, is answered locally. Everything else goes to the LLM, including
+follow-ups in a conversation, which only the LLM can read in context.
+"""
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from knowledge import tokenize
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# (intent, example questions, answer)
+FAQ: List[Tuple[str, List[str], str]] = [
+    ("greeting",
+     ["hi", "hello", "hey", "hello there", "hey there", "good morning", "hello, who are you?"],
+     "Hi! I'm TruthGuard Assistant. Ask me anything about verifying news, confidence scores or using TruthGuard."),
+    ("thanks",
+     ["thanks", "thank you", "thanks a lot, that helps"],
+     "You're welcome! Let me know if there's anything else I can help with."),
+    ("what_is_truthguard",
+     ["what is truthguard", "what does truthguard do", "tell me about this platform", "what is this site for"],
+     "TruthGuard is an AI-powered fake news detection platform. Paste a headline, article or URL and it is "
+     "classified as Real, Misleading or Fake, with a confidence score and the evidence behind the verdict."),
+    ("how_to_verify",
+     ["how do i verify news", "how to check if an article is fake", "how do i use truthguard",
+      "how can i verify a headline", "how do i check a url"],
+     "Log in, open the Verify page and paste the headline, article text or URL. The AI analyzes it and shows "
+     "whether it is Real, Misleading or Fake, with a confidence score and evidence. Your results are saved to "
+     "your History."),
+    ("confidence",
+     ["what does the confidence score mean", "what is the confidence percentage", "how is confidence calculated",
+      "what does confidence mean"],
+     "The confidence score (0-100%) shows how certain the AI is about its classification. A high score means "
+     "strong evidence for the verdict; a low score means the evidence was thin or mixed, so read the evidence "
+     "section and check other sources."),
+    ("classifications",
+     ["what does misleading mean", "what is misleading", "what is the difference between fake and misleading",
+      "what do the results mean", "what does real mean"],
+     "Real means the content checks out. Misleading means it is partially true, for example missing context "
+     "or exaggerated. Fake means it is false."),
+    ("login_required",
+     ["do i need to log in", "do i need to login", "is login required", "do i need an account", "can i verify without signing up",
+      "how do i sign up"],
+     "Yes, verifying news and viewing your history require an account: sign up with your email and a "
+     "password. The Trending and About pages are public."),
+    ("history",
+     ["where are my past verifications", "how do i see my history", "can i see previous results",
+      "where can i find my old checks"],
+     "Open the History page while logged in to see your past verifications. You can search them by text, "
+     "filter by result, confidence or date, and view your statistics."),
+    ("trending",
+     ["what is the trending page", "where can i see latest news", "what are trending verifications"],
+     "The Trending page shows live news from around the world with category filters, including verdict "
+     "badges for headlines TruthGuard has already checked, plus recent verifications from the community."),
+]
+# Answered the same whatever was said before
+CONTEXT_FREE_INTENTS = frozenset({"greeting", "thanks"})
+
+
+def is_follow_up(history: Optional[List[dict]]) -> bool:
+    # The chat widget always sends its opening greeting; only an earlier
+    # user turn gives the message a context
+    return any(turn.get("role") == "user" for turn in history or [])
+
+
+class FAQRouter:
+    """Answers messages that closely match a FAQ example question.
+
+    Example questions are rows of an L2-normalized TF-IDF matrix, so a
+    message's best cosine similarity is one matrix-vector product.
+    """
+
+    def __init__(self, faq: List[Tuple[str, List[str], str]], threshold: float = 0.7):
+        # numpy is imported on first use, keeping it out of module import time
+        import numpy as np
+        self.threshold = threshold
+        self.answers: Dict[str, str] = {intent: answer for intent, _, answer in faq}
+        self.intents: List[str] = []
+        self.examples: Dict[str, List[Set[str]]] = {}
+        tokenized = []
+        for intent, examples, _ in faq:
+            for example in examples:
+                self.intents.append(intent)
+                tokenized.append(tokenize(example))
+                self.examples.setdefault(intent, []).append(set(tokenized[-1]))
+        self.intent_words: Dict[str, Set[str]] = {
+            intent: set().union(*examples) for intent, examples in self.examples.items()
+        }
+        self.vocabulary: Dict[str, int] = {}
+        for tokens in tokenized:
+            for token in tokens:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+        tf = np.zeros((len(tokenized), len(self.vocabulary)), dtype=np.float32)
+        for row, tokens in enumerate(tokenized):
+            for token in tokens:
+                tf[row, self.vocabulary[token]] += 1
+        df = (tf > 0).sum(axis=0)
+        self.idf = (np.log((1 + len(tokenized)) / (1 + df)) + 1).astype(np.float32)
+        self.matrix = self._normalize(tf * self.idf)
+        self.counts = {"hits": 0, "misses": 0}
+        self.intent_hits: Dict[str, int] = {}
+
+    @staticmethod
+    def _normalize(vectors: "np.ndarray") -> "np.ndarray":
+        import numpy as np
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def match(self, message: str) -> Tuple[Optional[str], float]:
+        """Best matching intent for `message` and its similarity"""
+        import numpy as np
+        tokens = tokenize(message)
+        if not tokens:
+            return None, 0.0
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        # Words outside the FAQ vocabulary still count against the match
+        unknown = 0
+        for token in tokens:
+            if token in self.vocabulary:
+                vector[self.vocabulary[token]] += 1
+            else:
+                unknown += 1
+        weighted = vector * self.idf
+        norm = np.sqrt(np.dot(weighted, weighted) + unknown * float(self.idf.max()) ** 2)
+        if norm == 0:
+            return None, 0.0
+        scores = self.matrix @ (weighted / norm)
+        best = int(np.argmax(scores))
+        return self.intents[best], float(scores[best])
+
+    def covers(self, intent: str, message: str) -> bool:
+        """Whether `message` says everything one example of `intent` says,
+        and nothing the intent's examples do not"""
+        words = set(tokenize(message))
+        return words <= self.intent_words[intent] and any(example <= words for example in self.examples[intent])
+
+    def answer(self, message: str, history: Optional[List[dict]] = None) -> Optional[str]:
+        """The canned answer for `message`, or None when the LLM should answer"""
+        intent, score = self.match(message)
+        if (
+            intent is None
+            or score < self.threshold
+            or (is_follow_up(history) and intent not in CONTEXT_FREE_INTENTS)
+            or not self.covers(intent, message)
+        ):
+            self.counts["misses"] += 1
+            return None
+        self.counts["hits"] += 1
+        self.intent_hits[intent] = self.intent_hits.get(intent, 0) + 1
+        return self.answers[intent]
+
+    def stats(self) -> dict:
+        total = self.counts["hits"] + self.counts["misses"]
+        return dict(
+            self.counts,
+            hit_rate=round(self.counts["hits"] / total, 3) if total else None,
+            intents=self.intent_hits
+        )
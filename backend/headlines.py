@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from analysis import PROMPT_VERSION, run_analysis
+from claims import normalize_claim
+from tokens import token_scope
+
+logger = logging.getLogger(__name__)
+
+VERDICT_FIELDS = ("result", "confidence", "evidence")
+# A claim on a headline lapses (TTL index on pending_until) if its worker dies
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def strip_source(title: str, source: Optional[str] = None) -> str:
+    """NewsAPI titles end in " - <source name>", which users rarely paste"""
+    if source and title.endswith(f" - {source}"):
+        return title[:-len(source) - 3]
+    return title
+
+
+def headline_key(title: str) -> str:
+    return hashlib.sha256(f"{PROMPT_VERSION}:{normalize_claim(title)}".encode()).hexdigest()
+
+
+class HeadlineVerifier:
+    """Verifies NewsAPI headlines once, in the background.
+
+    Headlines from freshly fetched news pages are queued and verified by
+    `concurrency` workers, at most `daily_budget` LLM calls per UTC day
+    across all workers. Verdicts live in headline_verdicts, keyed by the
+    normalized title, where /api/news and /api/verify look them up.
+    """
+
+    def __init__(self, db, llm, concurrency: int = 2, daily_budget: int = 500,
+                 queue_size: int = 200, memory_size: int = 5000,
+                 on_verdict: Optional[Callable[[dict, dict], None]] = None):
+        self.db = db
+        self.llm = llm
+        self.concurrency = concurrency
+        self.daily_budget = daily_budget
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._queued = set()
+        # Finished verdicts never change, so they are kept in memory too
+        self._verdicts: OrderedDict = OrderedDict()
+        self.memory_size = memory_size
+        self.counts = {"queued": 0, "verified": 0, "failed": 0, "over_budget": 0}
+        self.on_verdict = on_verdict
+
+    def _remember(self, key: str, verdict: dict) -> None:
+        self._verdicts[key] = verdict
+        self._verdicts.move_to_end(key)
+        if len(self._verdicts) > self.memory_size:
+            self._verdicts.popitem(last=False)
+
+    def submit(self, articles: Iterable[dict]) -> None:
+        """Queue headlines not verified yet; never waits, drops when the queue is full"""
+        for article in articles:
+            title = strip_source(article.get("title") or "", (article.get("source") or {}).get("name"))
+            if not title.strip():
+                continue
+            key = headline_key(title)
+            if key in self._verdicts or key in self._queued:
+                continue
+            try:
+                self.queue.put_nowait((key, title, article))
+            except asyncio.QueueFull:
+                return
+            self._queued.add(key)
+            self.counts["queued"] += 1
+
+    async def take_budget(self) -> bool:
+        day = datetime.now(timezone.utc).date().isoformat()
+        try:
+            await self.db.jobs.update_one(
+                {"_id": f"headline_budget:{day}", "used": {"$lt": self.daily_budget}},
+                {"$inc": {"used": 1}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Today's budget is used up
+            return False
+        return True
+
+    async def verify(self, key: str, title: str, article: dict) -> None:
+        try:
+            # Another worker, or an earlier run, may have taken this headline
+            await self.db.headline_verdicts.insert_one({
+                "_id": key,
+                "title": title,
+                "url": article.get("url"),
+                "pending_until": datetime.now(timezone.utc) + CLAIM_TIMEOUT,
+            })
+        except DuplicateKeyError:
+            return
+        if not await self.take_budget():
+            self.counts["over_budget"] += 1
+            await self.db.headline_verdicts.delete_one({"_id": key, "result": {"$exists": False}})
+            return
+        content = title
+        if article.get("description"):
+            content += f"\n\n{article['description']}"
+        try:
+            with token_scope("headlines"):
+                analysis = await run_analysis(content, article.get("url"), self.llm)
+        except Exception as e:
+            logger.warning(f"Headline verification failed: {str(e)}")
+            self.counts["failed"] += 1
+            await self.db.headline_verdicts.delete_one({"_id": key, "result": {"$exists": False}})
+            return
+        verdict = dict(analysis, verified_at=datetime.now(timezone.utc).isoformat())
+        await self.db.headline_verdicts.update_one({"_id": key}, {"$set": verdict, "$unset": {"pending_until": ""}})
+        self._remember(key, verdict)
+        self.counts["verified"] += 1
+        if self.on_verdict is not None:
+            self.on_verdict(article, verdict)
+
+    async def _work(self) -> None:
+        while True:
+            key, title, article = await self.queue.get()
+            try:
+                await self.verify(key, title, article)
+            except Exception as e:
+                logger.warning(f"Headline verification failed: {str(e)}")
+            finally:
+                self._queued.discard(key)
+
+    async def run(self) -> None:
+        await asyncio.gather(*(self._work() for _ in range(self.concurrency)))
+
+    async def verdicts(self, db, keys: List[str]) -> Dict[str, dict]:
+        found = {key: self._verdicts[key] for key in keys if key in self._verdicts}
+        missing = [key for key in keys if key not in found]
+        if missing:
+            async for doc in db.headline_verdicts.find({"_id": {"$in": missing}, "result": {"$exists": True}}):
+                verdict = {field: doc[field] for field in (*VERDICT_FIELDS, "verified_at")}
+                self._remember(doc["_id"], verdict)
+                found[doc["_id"]] = verdict
+        return found
+
+    async def attach(self, db, articles: List[dict]) -> List[dict]:
+        """Add a `verdict` to every article whose headline has been verified"""
+        keys = [
+            headline_key(strip_source(article.get("title") or "", (article.get("source") or {}).get("name")))
+            for article in articles
+        ]
+        found = await self.verdicts(db, keys)
+        for article, key in zip(articles, keys):
+            if key in found:
+                article["verdict"] = {field: found[key][field] for field in ("result", "confidence")}
+        return articles
+
+    async def lookup(self, db, content: str) -> Optional[dict]:
+        """Stored verdict for content that is a verified headline, as pasted"""
+        if len(content) > 300:
+            return None
+        candidates = [content]
+        if " - " in content:
+            candidates.append(content.rsplit(" - ", 1)[0])
+        keys = [headline_key(candidate) for candidate in candidates]
+        found = await self.verdicts(db, keys)
+        for key in keys:
+            if key in found:
+                return {field: found[key][field] for field in VERDICT_FIELDS}
+        return None
+
+    def stats(self) -> dict:
+        return dict(self.counts, pending=self.queue.qsize())
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+
+
+class Readiness:
+    """Warm-up steps a worker must complete before it takes traffic.
+
+    Each step maps to None once done, or to "pending" / its last error.
+    A step that succeeded is not run again. Optional steps are reported but
+    do not hold readiness back, for work that depends on upstream APIs.
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, Optional[str]] = {}
+        self.optional: Set[str] = set()
+
+    def expect(self, *steps: str) -> None:
+        for step in steps:
+            self.steps.setdefault(step, PENDING)
+
+    async def run(self, step: str, work: Callable[[], Awaitable], optional: bool = False) -> bool:
+        self.expect(step)
+        if optional:
+            self.optional.add(step)
+        if self.steps[step] is None:
+            return True
+        try:
+            await work()
+        except Exception as e:
+            self.steps[step] = str(e) or type(e).__name__
+            logger.warning(f"Warm-up step {step} failed: {self.steps[step]}")
+            return False
+        self.steps[step] = None
+        return True
+
+    def done(self, step: str) -> bool:
+        return self.steps.get(step, PENDING) is None
+
+    @property
+    def ready(self) -> bool:
+        return all(error is None for step, error in self.steps.items() if step not in self.optional)
+
+    def report(self) -> Dict[str, str]:
+        return {step: "ok" if error is None else error for step, error in self.steps.items()}
+
+
+class UpstreamLatency:
+    """Recent latencies and the last error of calls to one upstream API"""
+
+    def __init__(self, size: int = 100):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.last_error: Optional[str] = None
+        self.last_at: Optional[float] = None
+
+    def record(self, elapsed: float, error: Optional[str] = None) -> None:
+        self.samples.append(elapsed)
+        self.last_error = error
+        self.last_at = time.time()
+
+    def stats(self) -> dict:
+        ordered = sorted(self.samples)
+
+        def percentile(q: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 1)
+
+        return {
+            "samples": len(ordered),
+            "last_ms": round(self.samples[-1] * 1000, 1) if self.samples else None,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "last_error": self.last_error,
+            "age_s": round(time.time() - self.last_at, 1) if self.last_at is not None else None,
+        }
+
+
+async def ping_mongo(db, timeout: float) -> dict:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout)
+    except Exception as e:
+        return {"ok": False, "error": str(e) or type(e).__name__}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
@@ -0,0 +1,114 @@
+"""TruthGuard knowledge for the chatbot, retrieved per turn.
+
+The knowledge lives in short documents indexed with BM25 at startup; each
+chatbot turn sends a minimal system prompt plus only the few documents
+relevant to the conversation instead of everything.
+"""
+import re
+from typing import Dict, List, Tuple
+
+SYSTEM_PROMPT = """You are TruthGuard Assistant, a helpful chatbot for the TruthGuard fake news detection platform.
+Answer questions about the platform, help users use it, explain the verification process and fake news detection.
+Base answers about TruthGuard on the reference notes provided; if none cover a question about the platform, say so.
+Be friendly and concise: under 150 words unless a detailed explanation is needed."""
+
+# (title, text); titles are indexed along with the text
+DOCUMENTS: List[Tuple[str, str]] = [
+    ("About TruthGuard",
+     "TruthGuard is an AI-powered fake news detection system. Users can verify news headlines, "
+     "articles or URLs for authenticity."),
+    ("Classification system",
+     "Every verification is classified as Real (verified), Misleading (partially true) or Fake (false)."),
+    ("Confidence scores",
+     "Each verification includes a confidence score from 0 to 100% and detailed evidence explaining "
+     "the reasoning behind the classification. A higher score means the AI is more certain of the result."),
+    ("How verification works",
+     "1. The user inputs news content or a URL. 2. The AI analyzes the content and cross-references "
+     "information. 3. The model classifies it as Real, Misleading or Fake. 4. The result is displayed "
+     "with its confidence score and evidence."),
+    ("Claim-by-claim verification",
+     "Longer articles are split into individual claims that are checked separately; the article verdict "
+     "combines the claim verdicts, and each claim's result is shown with the verification."),
+    ("Real-time detection",
+     "Verification is instant: paste a headline, article or URL on the Verify page and get an AI-powered "
+     "result in seconds."),
+    ("AI fact verification",
+     "Analysis uses OpenAI's GPT-4o-mini for advanced fact verification with evidence-based reasoning."),
+    ("History tracking",
+     "Signed-in users can view their past verifications on the History page, search them by text, "
+     "filter by result, confidence or date, and see statistics over time."),
+    ("Trending news",
+     "The Trending page shows real-time news from around the world with category filters. Headlines "
+     "are verified in the background and show a verdict badge once checked."),
+    ("Trending verifications",
+     "Community-wide recent verifications are listed with filters and update live as people verify news."),
+    ("Authentication",
+     "Users sign up with an email and password and log in to get access. Login is required for "
+     "verification and history features; the Trending and About pages are public."),
+    ("Technology",
+     "TruthGuard is powered by OpenAI's GPT-4o-mini, with a FastAPI backend, a MongoDB database, a React "
+     "frontend with a modern UI, JWT authentication for secure access and NewsAPI integration for "
+     "real-time news."),
+]
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or so that the this "
+    "to was what when where which who why will with you your s t m d ll re ve".split()
+)
+SUFFIXES = ("ications", "ication", "ations", "ation", "ying", "ing", "ied", "ies", "ed", "es", "s", "y", "e")
+
+
+def _stem(word: str) -> str:
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(word) for word in TOKEN_RE.findall(text.lower()) if word not in STOPWORDS]
+
+
+class KnowledgeIndex:
+    """Okapi BM25 over `documents`, as a dense document x term weight matrix.
+
+    The corpus is small and fixed, so every term weight is computed once and
+    a query is a column sum over its terms.
+    """
+
+    def __init__(self, documents: List[Tuple[str, str]], k1: float = 1.2, b: float = 0.75):
+        # numpy is imported on first use, keeping it out of module import time
+        import numpy as np
+        self.documents = documents
+        tokenized = [tokenize(f"{title} {text}") for title, text in documents]
+        self.vocabulary: Dict[str, int] = {}
+        for tokens in tokenized:
+            for token in tokens:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+        tf = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float32)
+        for row, tokens in enumerate(tokenized):
+            for token in tokens:
+                tf[row, self.vocabulary[token]] += 1
+        lengths = tf.sum(axis=1, keepdims=True)
+        df = (tf > 0).sum(axis=0)
+        idf = np.log1p((len(documents) - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1.0))
+        self.weights = idf * tf * (k1 + 1) / (tf + norm)
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[str, str]]:
+        """Up to `k` documents scoring above zero for `query`, best first"""
+        import numpy as np
+        columns = [self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary]
+        if not columns or k <= 0:
+            return []
+        scores = self.weights[:, columns].sum(axis=1)
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [self.documents[i] for i in top if scores[i] > 0]
+
+
+def build_system_prompt(snippets: List[Tuple[str, str]]) -> str:
+    if not snippets:
+        return SYSTEM_PROMPT
+    notes = "\n".join(f"- {title}: {text}" for title, text in snippets)
+    return f"{SYSTEM_PROMPT}\n\nREFERENCE NOTES:\n{notes}"
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Optional, Set, Tuple, Union
+
+from bson import Binary, ObjectId
+
+from responses import dumps
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = b": ping\n\n"
+# How long relayed events are kept, and how late one may be inserted after
+# its ObjectId was generated and still be delivered
+RELAY_TTL = 300
+RELAY_OVERLAP = 30
+
+
+def encode_event(event: str, data: Union[bytes, dict, list]) -> bytes:
+    """One server-sent event; orjson output never contains a newline"""
+    payload = data if isinstance(data, bytes) else dumps(data)
+    return b"event: " + event.encode() + b"\ndata: " + payload + b"\n\n"
+
+
+class Subscriber:
+    def __init__(self, buffer_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.overflowed = False
+
+
+class Broadcaster:
+    """Fans server-sent events out to every connected watcher of this worker.
+
+    Each event is encoded once and the same bytes are queued for every
+    subscriber. A subscriber whose buffer fills up (a client reading slower
+    than events arrive) is told to resync and disconnected instead of
+    holding memory or slowing the others down; EventSource reconnects.
+    """
+
+    def __init__(self, buffer_size: int = 64, heartbeat: float = 15.0, max_subscribers: int = 10000):
+        self.buffer_size = buffer_size
+        self.heartbeat = heartbeat
+        self.max_subscribers = max_subscribers
+        self.subscribers: Set[Subscriber] = set()
+        self.counts = {"published": 0, "overflows": 0}
+
+    @property
+    def full(self) -> bool:
+        return len(self.subscribers) >= self.max_subscribers
+
+    def publish(self, event: str, data: Union[bytes, dict, list]) -> None:
+        if not self.subscribers:
+            return
+        message = encode_event(event, data)
+        self.counts["published"] += 1
+        for subscriber in self.subscribers:
+            if subscriber.overflowed:
+                continue
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscriber.overflowed = True
+                self.counts["overflows"] += 1
+
+    async def stream(self, snapshot: Optional[bytes] = None) -> AsyncIterator[bytes]:
+        subscriber = Subscriber(self.buffer_size)
+        self.subscribers.add(subscriber)
+        try:
+            yield b"retry: 3000\n\n" + (snapshot or b"")
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    # Keeps idle connections open through proxies
+                    yield HEARTBEAT
+                    continue
+                yield message
+                if subscriber.overflowed and subscriber.queue.empty():
+                    yield encode_event("resync", {})
+                    return
+        finally:
+            self.subscribers.discard(subscriber)
+
+    def stats(self) -> dict:
+        return dict(self.counts, subscribers=len(self.subscribers))
+
+
+class EventRelay:
+    """Carries events published on one worker to the watchers of every other.
+
+    publish() delivers to this worker's watchers at once and queues the
+    event; run() appends queued events to a Mongo collection and publishes
+    those other workers appended since the last poll. Verifications travel
+    through the trending sync instead.
+    """
+
+    def __init__(self, broadcaster: Broadcaster, collection):
+        self.broadcaster = broadcaster
+        self.collection = collection
+        self.worker_id = uuid.uuid4().hex
+        self.pending: List[Tuple[str, bytes]] = []
+        self.seen: Set[ObjectId] = set()
+        self.started = ObjectId()
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("created_at", expireAfterSeconds=RELAY_TTL)
+
+    def publish(self, event: str, data: Union[bytes, dict, list]) -> None:
+        payload = data if isinstance(data, bytes) else dumps(data)
+        self.broadcaster.publish(event, payload)
+        self.pending.append((event, payload))
+
+    async def flush(self) -> None:
+        pending, self.pending = self.pending, []
+        if pending:
+            now = datetime.now(timezone.utc)
+            await self.collection.insert_many([
+                {"event": event, "data": Binary(payload), "worker": self.worker_id, "created_at": now}
+                for event, payload in pending
+            ])
+
+    async def poll(self) -> int:
+        since = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=RELAY_OVERLAP))
+        since = max(since, self.started)
+        self.seen = {event_id for event_id in self.seen if event_id > since}
+        relayed = 0
+        async for document in self.collection.find(
+            {"_id": {"$gt": since}, "worker": {"$ne": self.worker_id}}
+        ).sort("_id", 1):
+            if document["_id"] in self.seen:
+                continue
+            self.seen.add(document["_id"])
+            self.broadcaster.publish(document["event"], bytes(document["data"]))
+            relayed += 1
+        return relayed
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+                await self.poll()
+            except Exception as e:
+                logger.warning(f"Live event relay failed: {str(e)}")
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from tokens import TokenLedger, fit_messages
+
+logger = logging.getLogger(__name__)
+
+
+def upstream_failure(error: Exception) -> bool:
+    """Timeouts, connection failures, 429s and 5xxs: worth another route.
+
+    Other 4xxs (a bad request, an expired key) would fail on any route and
+    say nothing about this one's health.
+    """
+    # Routes are only built with an OpenAI client, so openai is loaded
+    import openai
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, (openai.APIConnectionError, asyncio.TimeoutError))
+
+
+class ModelRoute:
+    """One model on one endpoint, with rolling latency and error statistics"""
+
+    def __init__(self, name: str, model: str, client: Any, window: int = 200):
+        self.name = name
+        self.model = model
+        self.client = client
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # True for success
+        self.unhealthy_until = 0.0
+        self.counts = {"requests": 0, "errors": 0, "hedges": 0, "hedge_wins": 0, "failovers": 0}
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.unhealthy_until
+
+    def stats(self) -> dict:
+        p50 = self.percentile(0.5)
+        p95 = self.percentile(0.95)
+        return dict(
+            self.counts,
+            model=self.model,
+            error_rate=round(self.error_rate(), 3),
+            p50_ms=round(p50 * 1000, 1) if p50 is not None else None,
+            p95_ms=round(p95 * 1000, 1) if p95 is not None else None,
+            healthy=self.healthy(time.monotonic()),
+        )
+
+
+class LLMRouter:
+    """Latency-aware routing of chat completions across model routes.
+
+    The first healthy route serves each call. If it has not answered by its
+    rolling hedge percentile (p95 by default) a hedged duplicate is sent to
+    the next healthy route, or the same one when it is alone, and the first
+    successful answer wins. A call failing upstream (see upstream_failure)
+    fails over to the next route, and a route whose recent rate of such
+    errors spikes is skipped for a cooldown. Other errors are raised as is.
+
+    Prompts are fitted to `prompt_budget` tokens before they are sent and
+    the token usage of every answer goes to the ledger.
+    """
+
+    def __init__(
+        self,
+        routes: List[ModelRoute],
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+        error_rate_threshold: float = 0.5,
+        error_min_samples: int = 10,
+        cooldown: float = 30.0,
+        ledger: Optional[TokenLedger] = None,
+        prompt_budget: int = 0,
+        truncate_prompts: bool = True,
+    ):
+        self.routes = routes
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.error_rate_threshold = error_rate_threshold
+        self.error_min_samples = error_min_samples
+        self.cooldown = cooldown
+        self.ledger = ledger
+        self.prompt_budget = prompt_budget
+        self.truncate_prompts = truncate_prompts
+
+    def _candidates(self) -> List[ModelRoute]:
+        now = time.monotonic()
+        healthy = [route for route in self.routes if route.healthy(now)]
+        # With every route cooling down, still try them in order
+        return healthy or list(self.routes)
+
+    def _hedge_delay(self, route: ModelRoute) -> Optional[float]:
+        if self.hedge_percentile <= 0 or len(route.latencies) < self.hedge_min_samples:
+            return None
+        return route.percentile(self.hedge_percentile)
+
+    async def _call(self, route: ModelRoute, kwargs: dict):
+        route.counts["requests"] += 1
+        start = time.monotonic()
+        try:
+            response = await route.client.chat.completions.create(model=route.model, **kwargs)
+        except Exception as e:
+            if not upstream_failure(e):
+                raise
+            route.counts["errors"] += 1
+            route.outcomes.append(False)
+            if (
+                len(route.outcomes) >= self.error_min_samples
+                and route.error_rate() >= self.error_rate_threshold
+            ):
+                route.unhealthy_until = time.monotonic() + self.cooldown
+                logger.warning(f"LLM route {route.name} error rate spiked, cooling down")
+            raise
+        route.latencies.append(time.monotonic() - start)
+        route.outcomes.append(True)
+        return response
+
+    async def _hedged(self, primary: ModelRoute, hedge: ModelRoute, kwargs: dict):
+        first = asyncio.ensure_future(self._call(primary, kwargs))
+        second = None
+        pending = {first}
+        started = {first: (primary, time.monotonic())}
+        try:
+            delay = self._hedge_delay(primary)
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                primary.counts["hedges"] += 1
+                second = asyncio.ensure_future(self._call(hedge, kwargs))
+                pending.add(second)
+                started[second] = (hedge, time.monotonic())
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            primary.counts["hedge_wins"] += 1
+                        # The loser's elapsed time is a lower bound on its
+                        # latency, and recording it lets p95 follow a slowing
+                        # route; calls cancelled for other reasons (a client
+                        # disconnecting) say nothing about the route
+                        now = time.monotonic()
+                        for loser in pending:
+                            route, start = started[loser]
+                            route.latencies.append(now - start)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def complete(self, **kwargs):
+        """Create a chat completion; kwargs are passed through except `model`"""
+        messages = kwargs.get("messages")
+        if messages is not None and self.prompt_budget > 0:
+            fitted = fit_messages(messages, self.prompt_budget, self.routes[0].model, self.truncate_prompts)
+            if fitted is not messages:
+                if self.ledger is not None:
+                    self.ledger.record_truncation()
+                kwargs = dict(kwargs, messages=fitted)
+        candidates = self._candidates()
+        error = None
+        for index, route in enumerate(candidates):
+            if index > 0:
+                candidates[index - 1].counts["failovers"] += 1
+                logger.warning(f"LLM failover from {candidates[index - 1].name} to {route.name}")
+            hedge = candidates[index + 1] if index + 1 < len(candidates) else route
+            try:
+                response = await self._hedged(route, hedge, kwargs)
+            except Exception as e:
+                if not upstream_failure(e):
+                    raise
+                error = e
+                continue
+            # Only the winner of a hedge race is counted; a cancelled loser's usage is unknown
+            if self.ledger is not None:
+                self.ledger.record(getattr(response, "usage", None))
+            return response
+        raise error
+
+    def stats(self) -> Dict[str, dict]:
+        return {route.name: route.stats() for route in self.routes}
+
+    async def close(self) -> None:
+        clients = {id(route.client): route.client for route in self.routes}
+        for client in clients.values():
+            await client.close()
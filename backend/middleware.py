@@ -0,0 +1,201 @@
+import gzip
+import hashlib
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/x-ndjson")
+
+
+def _add_vary(headers: MutableHeaders, value: str) -> None:
+    existing = headers.get("vary")
+    if existing is None:
+        headers["vary"] = value
+    elif value.lower() not in [v.strip().lower() for v in existing.split(",")]:
+        headers["vary"] = f"{existing}, {value}"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison as required for If-None-Match (RFC 9110 13.1.2)"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ConditionalGetMiddleware:
+    """Adds ETags to read-only JSON responses and answers If-None-Match with 304.
+
+    Only single-message (non-streaming) 200 responses are considered; streamed
+    bodies pass through untouched. The ETag is computed on the uncompressed
+    body and marked weak so it stays valid across content encodings.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str]) -> None:
+        self.app = app
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or not scope["path"].startswith(self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        if_none_match = request_headers.get("if-none-match")
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                if message["status"] != 200:
+                    passthrough = True
+                    await send(message)
+                return
+
+            # First body message
+            if message.get("more_body", False):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start_message)
+            etag = headers.get("etag")
+            if etag is None:
+                digest = hashlib.blake2b(message.get("body", b""), digest_size=16).hexdigest()
+                etag = f'W/"{digest}"'
+                headers["etag"] = etag
+            if "cache-control" not in headers:
+                # Clients may keep the body but must revalidate every time
+                private = "authorization" in request_headers
+                headers["cache-control"] = "private, no-cache" if private else "no-cache"
+            if "authorization" in request_headers:
+                _add_vary(headers, "Authorization")
+
+            if if_none_match and _etag_matches(if_none_match, etag):
+                not_modified = MutableHeaders()
+                for name in ("etag", "cache-control", "vary"):
+                    if name in headers:
+                        not_modified[name] = headers[name]
+                await send({"type": "http.response.start", "status": 304, "headers": not_modified.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {}
+    for item in accept_encoding.split(","):
+        parts = item.strip().split(";")
+        coding = parts[0].strip().lower()
+        quality = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """gzip/brotli compression for complete response bodies above a size threshold.
+
+    Streaming responses (exports, event streams) are never buffered or
+    compressed here so they keep flowing to the client as they are produced.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start_message)
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                passthrough = True
+                if not message.get("more_body", False):
+                    _add_vary(headers, "Accept-Encoding")
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = self.compress(body, encoding)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            _add_vary(headers, "Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
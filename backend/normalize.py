@@ -0,0 +1,125 @@
+"""Canonical form of submitted news content.
+
+Pasted articles carry share widgets, repeated paragraphs, tracking URLs and
+emoji runs that cost prompt tokens and make identical articles hash
+differently. normalize_content() runs before any cache lookup and before the
+LLM sees the text, so both work on the same canonical form.
+"""
+import re
+import unicodedata
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Whole lines that are page furniture rather than article text. Each
+# alternative matches a complete line of a known shape, never a line that
+# merely starts with the same words ("Copyright office rules that ...")
+SOCIAL_NETWORKS = r"(?:facebook|twitter|x|instagram|linkedin|whatsapp|reddit|pinterest|youtube|tiktok|email)"
+BOILERPLATE_RE = re.compile(
+    r"(?:"
+    rf"(?:share|tweet|pin|email)(?: (?:this|on {SOCIAL_NETWORKS}))?|"
+    rf"share (?:this )?(?:article|story|post)(?: on {SOCIAL_NETWORKS})?|"
+    rf"(?:follow|like) us on {SOCIAL_NETWORKS}(?:(?:,| and| or) {SOCIAL_NETWORKS})*|"
+    r"advertisement|sponsored(?: content)?|ad|"
+    r"(?:click|tap) here to (?:subscribe|sign up|read more|continue reading|comment)|"
+    r"(?:sign up|subscribe) (?:for|to) (?:our|the) (?:free )?(?:daily |weekly )?newsletter|"
+    r"(?:read|see) (?:more|also)(?::? https?://\S+)?|"
+    r"related(?: articles| stories| coverage)?|"
+    r"(?:©|\(c\)|copyright ©|copyright \(c\)) ?\d{4}(?:-\d{4})?(?: [\w&'.,-]+){0,5}(?: all rights reserved)?|"
+    r"copyright \d{4}(?:-\d{4})?(?: [\w&'.,-]+){0,5} all rights reserved|"
+    r"all rights reserved|"
+    r"(?:we use|this (?:site|website) uses) cookies(?: to (?:improve|enhance|personali[sz]e) (?:your|the) (?:browsing )?experience)?|"
+    r"(?:accept|manage) (?:all )?cookies|"
+    r"skip to (?:main )?content|"
+    r"(?:image|photo|video) (?:credit|courtesy): [\w&'., /-]{1,60}|"
+    r"\d+ (?:shares|comments)"
+    r")[.!:]?",
+    re.IGNORECASE
+)
+URL_RE = re.compile(r"https?://[^\s<>\"')\]]+", re.IGNORECASE)
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+NON_WORD_RE = re.compile(r"[^\w]+")
+# Runs of the same pictograph or symbol ("🔥🔥🔥", "!!!!!!"); ellipses are kept
+SYMBOL_RUN_RE = re.compile(r"([^\w\s.])(?:\s*\1){2,}")
+ZERO_WIDTH_RE = re.compile(r"[\u200b-\u200f\u2060\ufeff]")
+
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "ref_url", "cmpid", "ocid", "smid", "s_cid", "guccounter",
+}
+TRACKING_PREFIXES = ("utm_", "__twitter", "_hs")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Sentences shorter than this (in words) may legitimately repeat
+MIN_DEDUP_WORDS = 4
+
+
+def canonical_url(url: str) -> str:
+    """`url` without tracking parameters, fragment, default port or case noise.
+
+    Only used for text sent to the LLM and for cache keys; the URL a user
+    submitted is stored as given.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    if not parts.scheme or not parts.hostname:
+        return url.strip()
+    scheme = parts.scheme.lower()
+    host = parts.hostname.lower()
+    netloc = host if port is None or port == DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def normalize_url(url: Optional[str]) -> Optional[str]:
+    if url is None:
+        return None
+    return canonical_url(url) or None
+
+
+def _canonical_urls(text: str) -> str:
+    def replace(match: re.Match) -> str:
+        # Sentence punctuation right after a URL is not part of it
+        raw = match.group(0)
+        stripped = raw.rstrip(".,;:!?")
+        return canonical_url(stripped) + raw[len(stripped):]
+    return URL_RE.sub(replace, text)
+
+
+def _sentence_key(sentence: str) -> str:
+    return NON_WORD_RE.sub(" ", sentence.lower()).strip()
+
+
+def normalize_content(content: str) -> str:
+    """Canonical form of `content`.
+
+    Applies NFKC, drops zero-width characters and boilerplate lines,
+    canonicalizes URLs, collapses symbol runs and whitespace (keeping one
+    newline between paragraphs) and removes repeated sentences.
+    """
+    text = ZERO_WIDTH_RE.sub("", unicodedata.normalize("NFKC", content))
+    text = _canonical_urls(text)
+    text = SYMBOL_RUN_RE.sub(r"\1", text)
+
+    seen = set()
+    paragraphs = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line or BOILERPLATE_RE.fullmatch(line):
+            continue
+        sentences = []
+        for sentence in SENTENCE_RE.split(line):
+            key = _sentence_key(sentence)
+            if len(key.split()) >= MIN_DEDUP_WORDS:
+                if key in seen:
+                    continue
+                seen.add(key)
+            sentences.append(sentence)
+        if sentences:
+            paragraphs.append(" ".join(sentences))
+    return "\n".join(paragraphs)
@@ -0,0 +1,131 @@
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Tuple
+
+Stack = Tuple[str, ...]
+
+_running = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Statistical profiler that samples one thread's stack from a helper thread.
+
+    Nothing is installed in the profiled thread (no sys.setprofile hooks), so
+    there is no cost at all until start() and only the sampling thread's
+    periodic stack walk while it runs.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> Dict[str, float]:
+    """How late the event loop wakes a sleeping coroutine, in milliseconds"""
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, (time.perf_counter() - start - interval) * 1000))
+    if not lags:
+        return {}
+    ordered = sorted(lags)
+    return {
+        "samples": len(lags),
+        "mean_ms": round(statistics.fmean(lags), 2),
+        "p50_ms": round(ordered[len(ordered) // 2], 2),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+async def profile_event_loop(seconds: float, interval: float) -> Tuple[SamplingProfiler, Dict[str, float]]:
+    """Sample this worker's event-loop thread for `seconds`, one run at a time"""
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        profiler = SamplingProfiler(threading.get_ident(), interval)
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(measure_loop_lag(stop))
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+            stop.set()
+        return profiler, await lag_task
+    finally:
+        _running.release()
+
+
+def to_collapsed(profiler: SamplingProfiler) -> str:
+    """Brendan Gregg's collapsed-stack format, for flamegraph.pl or speedscope"""
+    lines = [f"{';'.join(stack)} {count}" for stack, count in profiler.stacks.most_common()]
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(profiler: SamplingProfiler, name: str) -> dict:
+    frames = []
+    frame_index: Dict[str, int] = {}
+    samples = []
+    weights = []
+    for stack, count in profiler.stacks.items():
+        indexes = []
+        for label in stack:
+            if label not in frame_index:
+                frame_index[label] = len(frames)
+                frames.append({"name": label})
+            indexes.append(frame_index[label])
+        samples.append(indexes)
+        weights.append(count * profiler.interval * 1000)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "truthguard",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
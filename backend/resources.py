@@ -0,0 +1,274 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from functools import cached_property
+from typing import Coroutine, Dict, List, Optional
+
+import httpx
+import orjson
+from fastapi import Request
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+
+from admission import AdmissionController, Lane
+from archive import ensure_body_ref_indexes
+from bodies import BodyStore, ensure_body_search_index, ensure_search_indexes
+from claims import ClaimVerifier
+from faq import FAQ, FAQRouter
+from headlines import HeadlineVerifier
+from health import Readiness, UpstreamLatency
+from knowledge import DOCUMENTS, KnowledgeIndex
+from live import Broadcaster, EventRelay
+from llm_router import LLMRouter, ModelRoute
+from responses import dumps
+from settings import Settings
+from shared_cache import SharedBodyCache, default_cache_dir
+from tokens import TokenLedger
+from trending import TrendingTracker
+
+logger = logging.getLogger(__name__)
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+MIN_MAX_STALENESS = 90
+NEWS_PAGES_TRACKED = 2000
+
+
+def make_read_preference(mode: str, max_staleness: int):
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    if mode == "primary":
+        return Primary()
+    # maxStalenessSeconds must be at least 90 (heartbeat + idle write
+    # period); -1 means no limit
+    if max_staleness != -1 and max_staleness < MIN_MAX_STALENESS:
+        raise ValueError(
+            f"MAX_STALENESS_SECONDS must be -1 or at least {MIN_MAX_STALENESS}, got {max_staleness}"
+        )
+    return READ_PREFERENCES[mode](max_staleness=max_staleness)
+
+
+class Resources:
+    """Connection pools and caches shared by every request of one app.
+
+    Created by the app lifespan: open() builds and warms the pools before the
+    first request is accepted and close() releases them on shutdown.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.mongo: Optional[AsyncIOMotorClient] = None
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self.read_dbs: Dict[str, AsyncIOMotorDatabase] = {}
+        self.bodies: Optional[BodyStore] = None
+        self.relay: Optional[EventRelay] = None
+        self.http: Optional[httpx.AsyncClient] = None
+        self.llm: Optional[LLMRouter] = None  # only when a key is configured
+        self.claims: Optional[ClaimVerifier] = None
+        self.headlines: Optional[HeadlineVerifier] = None
+        self.shared_cache = SharedBodyCache(
+            settings.shared_cache_dir or default_cache_dir(settings.db_name), version=settings.cache_version
+        )
+        # Article URL -> cached news pages showing it, to patch in late verdicts
+        self.news_pages: OrderedDict = OrderedDict()
+        self.trending = TrendingTracker(k=settings.trending_top_k)
+        self.live = Broadcaster(
+            buffer_size=settings.live_buffer_size,
+            heartbeat=settings.live_heartbeat,
+            max_subscribers=settings.live_max_subscribers
+        )
+        self.admission = AdmissionController(
+            [
+                Lane("verify", 0, settings.verify_queue_size, settings.verify_deadline),
+                Lane("chatbot", 1, settings.chatbot_queue_size, settings.chatbot_deadline),
+            ],
+            concurrency=settings.llm_max_concurrency
+        )
+        self.tokens = TokenLedger()
+        self.readiness = Readiness()
+        self.newsapi_latency = UpstreamLatency()
+        self.tasks: List[asyncio.Task] = []
+
+    # The chatbot's indexes are built on its first use, keeping numpy out of
+    # worker startup
+    @cached_property
+    def knowledge(self) -> KnowledgeIndex:
+        return KnowledgeIndex(DOCUMENTS)
+
+    @cached_property
+    def faq(self) -> Optional[FAQRouter]:
+        return FAQRouter(FAQ, self.settings.chatbot_faq_threshold) if self.settings.chatbot_faq else None
+
+    async def open(self) -> None:
+        settings = self.settings
+        self.mongo = AsyncIOMotorClient(
+            settings.mongo_url,
+            serverSelectionTimeoutMS=settings.mongo_connect_timeout_ms,
+            maxPoolSize=settings.mongo_max_pool_size,
+            minPoolSize=settings.mongo_min_pool_size,
+            maxIdleTimeMS=settings.mongo_max_idle_time_ms or None,
+            waitQueueTimeoutMS=settings.mongo_wait_queue_timeout_ms or None,
+        )
+        # Writes and read-your-writes paths always use the primary
+        self.db = self.mongo[settings.db_name]
+        self.relay = EventRelay(self.live, self.db.live_events)
+        self.bodies = BodyStore(
+            self.db,
+            compression=settings.body_compression,
+            compress_min_size=settings.body_compress_min_size
+        )
+        self.read_dbs = {
+            query_class: self.mongo.get_database(
+                settings.db_name,
+                read_preference=make_read_preference(mode, settings.max_staleness_seconds)
+            )
+            for query_class, mode in (
+                ("public", settings.read_preference_public),
+                ("analytics", settings.read_preference_analytics),
+                ("user", settings.read_preference_user),
+            )
+        }
+        self.http = httpx.AsyncClient(
+            timeout=settings.http_timeout,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+        if settings.openai_api_key:
+            self.llm = self.build_llm_router()
+            if settings.claim_pipeline:
+                self.claims = ClaimVerifier(
+                    self.db,
+                    self.llm,
+                    max_claims=settings.claim_max_claims,
+                    concurrency=settings.claim_concurrency,
+                    min_words=settings.claim_min_words
+                )
+            if settings.headline_auto_verify:
+                self.headlines = HeadlineVerifier(
+                    self.db,
+                    self.llm,
+                    concurrency=settings.headline_concurrency,
+                    daily_budget=settings.headline_daily_budget,
+                    on_verdict=self.on_headline_verdict
+                )
+        await self.warm_up()
+
+    def remember_news_page(self, key: str, articles: List[dict]) -> None:
+        for article in articles:
+            if article.get("url") and "verdict" not in article:
+                self.news_pages.setdefault(article["url"], set()).add(key)
+                self.news_pages.move_to_end(article["url"])
+        while len(self.news_pages) > NEWS_PAGES_TRACKED:
+            self.news_pages.popitem(last=False)
+
+    def on_headline_verdict(self, article: dict, verdict: dict) -> None:
+        url = article.get("url")
+        badge = {"result": verdict['result'], "confidence": verdict['confidence']}
+        self.relay.publish("headlines", [{"url": url, "verdict": badge}])
+
+        def with_verdict(body: bytes) -> bytes:
+            news = orjson.loads(body)
+            for item in news["articles"]:
+                if item.get("url") == url:
+                    item["verdict"] = badge
+            return dumps(news)
+
+        # Cached pages carry the verdicts known when they were built
+        for key in self.news_pages.pop(url, ()):
+            self.shared_cache.update(key, with_verdict)
+
+    def build_llm_router(self) -> LLMRouter:
+        # openai is slow to import and unused without a key
+        from openai import AsyncOpenAI
+        settings = self.settings
+        # The router hedges and fails over itself; client retries would hide
+        # slow and failing routes from it
+        client = AsyncOpenAI(api_key=settings.openai_api_key, timeout=settings.llm_timeout, max_retries=0)
+        routes = [ModelRoute("primary", settings.llm_model, client)]
+        if settings.llm_fallback_model or settings.llm_fallback_base_url:
+            fallback_client = client
+            if settings.llm_fallback_base_url:
+                fallback_client = AsyncOpenAI(
+                    api_key=settings.llm_fallback_api_key or settings.openai_api_key,
+                    base_url=settings.llm_fallback_base_url,
+                    timeout=settings.llm_timeout,
+                    max_retries=0
+                )
+            routes.append(ModelRoute("fallback", settings.llm_fallback_model or settings.llm_model, fallback_client))
+        return LLMRouter(
+            routes,
+            hedge_percentile=settings.llm_hedge_percentile,
+            hedge_min_samples=settings.llm_hedge_min_samples,
+            error_rate_threshold=settings.llm_error_rate_threshold,
+            cooldown=settings.llm_failover_cooldown,
+            ledger=self.tokens,
+            prompt_budget=settings.llm_prompt_budget,
+            truncate_prompts=settings.llm_prompt_overflow != "reject"
+        )
+
+    async def warm_up(self) -> None:
+        """Establish the first pooled Mongo connection before serving traffic"""
+        # A short ping, so an unreachable Mongo does not hold up startup for
+        # the full server selection timeout; keep_warming retries it
+        if await self.readiness.run(
+            "mongo", lambda: asyncio.wait_for(self.db.command("ping"), self.settings.health_ping_timeout)
+        ):
+            await self.readiness.run("indexes", self.ensure_indexes)
+        else:
+            self.readiness.expect("indexes")
+
+    async def ensure_indexes(self) -> None:
+        await self.db.verifications.create_index([("timestamp", -1)])
+        await self.db.verifications.create_index([("user_id", 1), ("timestamp", -1)])
+        await self.db.verifications.create_index([("expires_at", 1)], expireAfterSeconds=0)
+        await self.db.user_stats.create_index("user_id", unique=True)
+        await ensure_body_ref_indexes(self.db.verifications)
+        await ensure_search_indexes(self.db.verifications)
+        await ensure_body_search_index(self.db.bodies)
+        await self.db.headline_verdicts.create_index([("pending_until", 1)], expireAfterSeconds=0)
+        await self.relay.ensure_indexes()
+        await self.db.token_usage.create_index([("day", 1), ("route", 1), ("user_id", 1)], unique=True)
+        await self.db.claim_verdicts.create_index(
+            "created_at",
+            expireAfterSeconds=int(self.settings.claim_cache_ttl_days * 86400)
+        )
+
+    def read_db(self, query_class: str) -> AsyncIOMotorDatabase:
+        """Database handle for a query class.
+
+        public: anonymous feeds such as /api/trending
+        analytics: exports and the trending tracker's scans
+        user: a user's own history, search and stats (read-your-writes)
+        """
+        return self.read_dbs[query_class]
+
+    def start_task(self, coro: Coroutine) -> asyncio.Task:
+        """Run a background coroutine for the lifetime of the app"""
+        task = asyncio.create_task(coro)
+        self.tasks.append(task)
+        return task
+
+    async def close(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.llm is not None:
+            await self.llm.close()
+        if self.http is not None:
+            await self.http.aclose()
+        if self.mongo is not None:
+            self.mongo.close()
+
+
+def get_resources(request: Request) -> Resources:
+    return request.app.state.resources
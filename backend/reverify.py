@@ -0,0 +1,328 @@
+"""Re-run stored verifications through the current analysis prompt.
+
+Picks up every verification analyzed with an older PROMPT_VERSION (or whose
+analysis failed), in the hot collection and then each archive partition,
+re-analyzes it and writes the new verdict with bulk_write. Progress is
+checkpointed after every chunk, so an interrupted run resumes where it
+stopped.
+
+Run from backend/:
+    python reverify.py                          # online, 8 concurrent LLM calls
+    python reverify.py --concurrency 16 --since 2025-01-01
+    python reverify.py --mode batch --chunk-size 5000   # OpenAI Batch API
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from analysis import COMPLETION_PARAMS, PROMPT_VERSION, build_messages, parse_analysis, run_analysis
+from archive import HOT_COLLECTION, archive_names
+from bodies import BodyStore, hydrate
+from normalize import normalize_content, normalize_url
+from resources import Resources
+from settings import Settings
+from stats import verdict_correction
+
+logger = logging.getLogger("reverify")
+
+PROJECTION = {
+    "_id": 1, "id": 1, "user_id": 1, "content": 1, "content_hash": 1, "url": 1,
+    "result": 1, "confidence": 1, "timestamp": 1,
+}
+BATCH_TERMINAL = ("completed", "failed", "expired", "cancelled")
+
+
+class Checkpoint:
+    """Resume state, rewritten atomically after every applied chunk"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state = {
+            "prompt_version": PROMPT_VERSION,
+            "collection": HOT_COLLECTION,
+            "last_id": None,
+            "processed": 0,
+            "changed": 0,
+            "failed": 0,
+            "batch": None,
+        }
+        if os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if saved.get("prompt_version") == PROMPT_VERSION:
+                self.state.update(saved)
+            else:
+                logger.info("Checkpoint is for another prompt version, starting over")
+
+    @property
+    def last_id(self) -> Optional[ObjectId]:
+        return ObjectId(self.state["last_id"]) if self.state["last_id"] else None
+
+    def start_collection(self, name: str) -> None:
+        if name != self.state["collection"]:
+            self.state.update(collection=name, last_id=None)
+            self.save()
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+
+class Progress:
+    def __init__(self, total: int, checkpoint: Checkpoint):
+        self.total = total
+        self.checkpoint = checkpoint
+        self.started = time.monotonic()
+        self.done_this_run = 0
+
+    def report(self, count: int) -> None:
+        self.done_this_run += count
+        state = self.checkpoint.state
+        elapsed = time.monotonic() - self.started
+        rate = self.done_this_run / elapsed if elapsed else 0.0
+        remaining = max(self.total - self.done_this_run, 0)
+        eta = f"{remaining / rate / 60:.1f} min" if rate else "?"
+        logger.info(
+            f"{self.done_this_run}/{self.total} this run "
+            f"({state['processed']} total, {state['changed']} changed, {state['failed']} failed) "
+            f"{rate:.2f} docs/s, ETA {eta}"
+        )
+
+
+def build_query(args: argparse.Namespace, after: Optional[ObjectId] = None) -> dict:
+    query = {"$or": [
+        {"prompt_version": {"$ne": PROMPT_VERSION}},
+        {"analysis_failed": True},
+        # Failed rows stored before the analysis_failed flag existed
+        {"evidence": {"$regex": "^Analysis failed"}},
+    ]}
+    if args.user_id:
+        query["user_id"] = args.user_id
+    timestamp = {}
+    if args.since:
+        timestamp["$gte"] = args.since
+    if args.until:
+        timestamp["$lt"] = args.until
+    if timestamp:
+        query["timestamp"] = timestamp
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    return query
+
+
+async def collections_to_scan(db, args: argparse.Namespace, checkpoint: Checkpoint) -> List[str]:
+    """The hot collection, then the archive partitions, from the checkpointed one on"""
+    names = [HOT_COLLECTION, *await archive_names(db, build_query(args))]
+    if checkpoint.state["collection"] in names:
+        return names[names.index(checkpoint.state["collection"]):]
+    return names
+
+
+async def next_chunk(
+    db, collection: str, args: argparse.Namespace, after: Optional[ObjectId], normalize: bool = False
+) -> List[dict]:
+    # A fresh query per chunk: no cursor idles out while the LLM works
+    chunk = await db[collection].find(build_query(args, after), PROJECTION).sort(
+        "_id", 1
+    ).limit(args.chunk_size).to_list(args.chunk_size)
+    chunk = await hydrate(db, chunk, ("content",))
+    if normalize:
+        # Only the prompt changes; stored content is left as it was
+        for verification in chunk:
+            verification['content'] = normalize_content(verification['content']) or verification['content']
+            verification['url'] = normalize_url(verification.get('url'))
+    return chunk
+
+
+async def apply_results(
+    db, collection: str, bodies: BodyStore, results: List[Tuple[dict, Optional[dict]]], checkpoint: Checkpoint
+) -> None:
+    now = datetime.now(timezone.utc).isoformat()
+    updates = []
+    corrections = []
+    state = checkpoint.state
+    for verification, analysis in results:
+        state["processed"] += 1
+        if analysis is None:
+            state["failed"] += 1
+            continue
+        if (analysis['result'], analysis['confidence']) != (verification['result'], verification['confidence']):
+            state["changed"] += 1
+            correction = verdict_correction(verification, analysis)
+            if correction is not None:
+                corrections.append(correction)
+        updates.append((verification['_id'], dict(analysis, prompt_version=PROMPT_VERSION, reverified_at=now)))
+    if updates:
+        rows = await bodies.put(fields for _, fields in updates)
+        await db[collection].bulk_write([
+            UpdateOne(
+                {"_id": _id},
+                # Re-analysis is whole-article, so a claim breakdown would be stale
+                {"$set": row, "$unset": {"evidence": "", "claims": "", "analysis_failed": "", "expires_at": ""}}
+            )
+            for (_id, _), row in zip(updates, rows)
+        ], ordered=False)
+    if corrections:
+        await db.user_stats.bulk_write(corrections, ordered=False)
+
+
+async def run_online(resources: Resources, args: argparse.Namespace, checkpoint: Checkpoint, progress: Progress):
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def analyze(verification: dict) -> Tuple[dict, Optional[dict]]:
+        async with semaphore:
+            try:
+                return verification, await run_analysis(verification['content'], verification.get('url'), resources.llm)
+            except Exception as e:
+                logger.warning(f"Analysis failed for {verification['_id']}: {str(e)}")
+                return verification, None
+
+    for collection in await collections_to_scan(resources.db, args, checkpoint):
+        checkpoint.start_collection(collection)
+        while True:
+            chunk = await next_chunk(
+                resources.db, collection, args, checkpoint.last_id, resources.settings.normalize_content
+            )
+            if not chunk:
+                break
+            results = await asyncio.gather(*(analyze(verification) for verification in chunk))
+            await apply_results(resources.db, collection, resources.bodies, results, checkpoint)
+            checkpoint.state["last_id"] = str(chunk[-1]['_id'])
+            checkpoint.save()
+            progress.report(len(chunk))
+
+
+async def submit_batch(client, model: str, chunk: List[dict]) -> str:
+    lines = [
+        json.dumps({
+            "custom_id": str(verification['_id']),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": dict(
+                COMPLETION_PARAMS,
+                model=model,
+                messages=build_messages(verification['content'], verification.get('url'))
+            ),
+        })
+        for verification in chunk
+    ]
+    upload = await client.files.create(file=("reverify.jsonl", "\n".join(lines).encode()), purpose="batch")
+    batch = await client.batches.create(
+        input_file_id=upload.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+        metadata={"job": "reverify", "prompt_version": PROMPT_VERSION}
+    )
+    return batch.id
+
+
+async def collect_batch(client, batch_id: str, poll_interval: float) -> dict:
+    """Wait for a batch to finish and return parsed analyses by custom_id"""
+    while True:
+        batch = await client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        logger.info(
+            f"Batch {batch_id}: {batch.status}"
+            + (f" ({counts.completed}/{counts.total} done, {counts.failed} failed)" if counts else "")
+        )
+        if batch.status in BATCH_TERMINAL:
+            break
+        await asyncio.sleep(poll_interval)
+
+    analyses = {}
+    if batch.output_file_id:
+        output = await client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if item.get("error") or response.get("status_code") != 200:
+                continue
+            text = response["body"]["choices"][0]["message"]["content"]
+            analyses[item["custom_id"]] = parse_analysis(text)
+    return analyses
+
+
+async def run_batch(resources: Resources, args: argparse.Namespace, checkpoint: Checkpoint, progress: Progress):
+    route = resources.llm.routes[0]
+    for collection in await collections_to_scan(resources.db, args, checkpoint):
+        # A pending batch belongs to the checkpointed collection, the first one
+        checkpoint.start_collection(collection)
+        while True:
+            pending = checkpoint.state["batch"]
+            if pending is None:
+                chunk = await next_chunk(
+                    resources.db, collection, args, checkpoint.last_id, resources.settings.normalize_content
+                )
+                if not chunk:
+                    break
+                batch_id = await submit_batch(route.client, route.model, chunk)
+                pending = {"id": batch_id, "first_id": str(chunk[0]['_id']), "last_id": str(chunk[-1]['_id'])}
+                checkpoint.state["batch"] = pending
+                checkpoint.save()
+                logger.info(f"Submitted batch {batch_id} with {len(chunk)} verifications from {collection}")
+
+            analyses = await collect_batch(route.client, pending["id"], args.poll_interval)
+            # Re-read the covered range so corrections use the current stored verdicts
+            chunk = await resources.db[collection].find(
+                {"_id": {"$gte": ObjectId(pending["first_id"]), "$lte": ObjectId(pending["last_id"])},
+                 **build_query(args)},
+                PROJECTION
+            ).to_list(None)
+            results = [(verification, analyses.get(str(verification['_id']))) for verification in chunk]
+            await apply_results(resources.db, collection, resources.bodies, results, checkpoint)
+            checkpoint.state["last_id"] = pending["last_id"]
+            checkpoint.state["batch"] = None
+            checkpoint.save()
+            progress.report(len(chunk))
+
+
+async def main(args: argparse.Namespace) -> None:
+    resources = Resources(Settings.from_env())
+    await resources.open()
+    try:
+        if resources.llm is None:
+            raise SystemExit("OpenAI API key not configured")
+        checkpoint = Checkpoint(args.checkpoint)
+        collections = await collections_to_scan(resources.db, args, checkpoint)
+        total = await resources.db[collections[0]].count_documents(build_query(args, checkpoint.last_id))
+        for collection in collections[1:]:
+            total += await resources.db[collection].count_documents(build_query(args))
+        logger.info(f"{total} verifications to re-analyze with prompt version {PROMPT_VERSION}")
+        progress = Progress(total, checkpoint)
+        if args.mode == "batch":
+            await run_batch(resources, args, checkpoint, progress)
+        else:
+            await run_online(resources, args, checkpoint, progress)
+        logger.info(f"Done: {checkpoint.state}")
+    finally:
+        await resources.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("online", "batch"), default="online")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent LLM calls in online mode")
+    parser.add_argument("--chunk-size", type=int, default=200, help="verifications per checkpointed chunk")
+    parser.add_argument("--checkpoint", default="reverify.checkpoint.json")
+    parser.add_argument("--poll-interval", type=float, default=60.0, help="seconds between batch status checks")
+    parser.add_argument("--user-id", help="only this user's verifications")
+    parser.add_argument("--since", help="only verifications at or after this ISO timestamp")
+    parser.add_argument("--until", help="only verifications before this ISO timestamp")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main(parse_args()))
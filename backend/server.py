@@ -1,38 +1,52 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from dotenv import load_dotenv
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import asyncio
 import logging
-from pathlib import Path
+import os
+import time
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 import uuid
 from datetime import datetime, timezone, timedelta
-from passlib.context import CryptContext
 import jwt
-from openai import AsyncOpenAI
-import asyncio
-import requests
-
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
-
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+import httpx
+
+from middleware import CompressionMiddleware, ConditionalGetMiddleware
+from resources import Resources, get_resources
+from responses import TrustedJSONResponse, dumps
+from admission import ClientDisconnected, Overloaded, retry_after_header
+from analysis import PROMPT_VERSION, analyze_news_with_ai, build_messages
+from archive import Archiver, archive_names, find_history, low_value_expiry
+from bodies import hydrate, text_search
+from capture import CaptureMiddleware
+from export import ExportFormat, export_response
+from health import ping_mongo
+from knowledge import build_system_prompt
+from live import encode_event
+from normalize import normalize_content, normalize_url
+from profiler import ProfilerBusy, profile_event_loop, to_collapsed, to_speedscope
+from settings import Settings
+from timing import ServerTimingMiddleware, configure_slow_log, span
+from trending import story_key
+from tokens import PromptTooLarge, count_message_tokens, preload_encoding, token_scope
+from stats import get_user_stats, record_verification
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
-JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
-# Create the main app without a prefix
-app = FastAPI()
+TRENDING_LIMIT = 20
+# Ranked text search reads every row up to the requested page
+HISTORY_SEARCH_MAX_PAGE = 50
+# Each value is its own shared cache entry, so only these reach the cache
+NewsCategory = Literal["all", "business", "entertainment", "general", "health", "science", "sports", "technology"]
+# NewsAPI serves at most 100 top headlines, 20 per page
+NEWS_MAX_PAGE = 5
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -58,6 +72,13 @@ class VerifyRequest(BaseModel):
     content: str
     url: Optional[str] = None
 
+class ClaimVerdict(BaseModel):
+    claim: str
+    result: str
+    confidence: float
+    evidence: str
+    cached: bool = False
+
 class VerificationResult(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -67,8 +88,30 @@ class VerificationResult(BaseModel):
     result: str  # "Real", "Fake", "Misleading"
     confidence: float
     evidence: str
+    claims: Optional[List[ClaimVerdict]] = None  # per-claim breakdown, when decomposed
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class HistoryStats(BaseModel):
+    total: int
+    results: Dict[str, int]
+    average_confidence: float
+    activity: Dict[str, int]  # verifications per UTC day, oldest first
+
+class HistorySearchPage(BaseModel):
+    results: List[VerificationResult]
+    page: int
+    page_size: int
+    has_more: bool
+
+class TrendingStory(BaseModel):
+    key: str
+    title: str
+    source: str
+    status: str
+    confidence: float
+    submissions: int
+    last_seen: datetime
+
 class TrendingNews(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -79,27 +122,38 @@ class TrendingNews(BaseModel):
     verified_at: datetime
 
 # Helper functions
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    # passlib and its bcrypt backend are only needed by register/login
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
-def create_access_token(data: dict) -> str:
+def create_access_token(data: dict, secret: str) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, secret, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    resources: Resources = Depends(get_resources)
+) -> dict:
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        with span("jwt"):
+            payload = jwt.decode(token, resources.settings.jwt_secret, algorithms=[JWT_ALGORITHM])
         email = payload.get("sub")
         if email is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"email": email}, {"_id": 0})
+        with span("user_lookup"):
+            user = await resources.db.users.find_one({"email": email}, {"_id": 0})
         if user is None:
             raise HTTPException(status_code=401, detail="User not found")
         return user
@@ -108,82 +162,40 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-async def analyze_news_with_ai(content: str, url: Optional[str] = None) -> dict:
-    """Analyze news content using OpenAI GPT-4o-mini for fake news detection"""
-    try:
-        api_key = os.environ.get('OPENAI_API_KEY')
-        if not api_key:
-            raise Exception("OpenAI API key not configured")
-        
-        client = AsyncOpenAI(api_key=api_key)
-        
-        system_message = """You are an expert fact-checker and fake news detector. Analyze the given news content and provide:
-1. Classification: Real, Fake, or Misleading
-2. Confidence score (0-100)
-3. Evidence and reasoning for your classification
-
-Provide your response in this exact format:
-CLASSIFICATION: [Real/Fake/Misleading]
-CONFIDENCE: [0-100]
-EVIDENCE: [Your detailed reasoning and evidence]"""
-        
-        prompt = f"Analyze this news content for authenticity:\n\n{content}"
-        if url:
-            prompt += f"\n\nSource URL: {url}"
-        
-        response = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        response_text = response.choices[0].message.content.strip()
-        
-        # Parse the response
-        lines = response_text.split('\n')
-        classification = "Misleading"
-        confidence = 50.0
-        evidence = "Unable to fully analyze the content."
-        
-        for line in lines:
-            if line.startswith("CLASSIFICATION:"):
-                classification = line.split(":", 1)[1].strip()
-            elif line.startswith("CONFIDENCE:"):
-                try:
-                    confidence = float(line.split(":", 1)[1].strip())
-                except:
-                    confidence = 50.0
-            elif line.startswith("EVIDENCE:"):
-                evidence = line.split(":", 1)[1].strip()
-        
-        # If evidence wasn't parsed correctly, use the whole response
-        if evidence == "Unable to fully analyze the content." and len(response_text) > 50:
-            parts = response_text.split("EVIDENCE:", 1)
-            if len(parts) > 1:
-                evidence = parts[1].strip()
-            else:
-                evidence = response_text
-        
-        return {
-            "result": classification,
-            "confidence": confidence,
-            "evidence": evidence
-        }
-    except Exception as e:
-        logging.error(f"AI analysis error: {str(e)}")
-        return {
-            "result": "Misleading",
-            "confidence": 0.0,
-            "evidence": f"Analysis failed: {str(e)}"
-        }
+async def get_admin_user(
+    current_user: dict = Depends(get_current_user),
+    resources: Resources = Depends(get_resources)
+) -> dict:
+    if current_user['email'].lower() not in resources.settings.admin_emails:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
 
 # Routes
+@api_router.get("/health/live")
+async def health_live():
+    """Liveness: the worker's event loop is answering"""
+    return {"status": "ok"}
+
+@api_router.get("/health/ready")
+async def health_ready(resources: Resources = Depends(get_resources)):
+    """Readiness: warm-up finished and Mongo answers; reports upstream latency"""
+    mongo = await ping_mongo(resources.db, resources.settings.health_ping_timeout)
+    upstream = {"newsapi": resources.newsapi_latency.stats()}
+    if resources.llm is not None:
+        upstream["llm"] = resources.llm.stats()
+    ready = resources.readiness.ready and mongo["ok"]
+    return ORJSONResponse(
+        {
+            "status": "ready" if ready else "not_ready",
+            "warm_up": resources.readiness.report(),
+            "mongo": mongo,
+            "upstream": upstream,
+        },
+        status_code=200 if ready else 503
+    )
+
 @api_router.post("/auth/register")
-async def register(user_data: UserRegister):
+async def register(user_data: UserRegister, resources: Resources = Depends(get_resources)):
     # Validate name
     if not user_data.name or len(user_data.name.strip()) < 2:
         raise HTTPException(status_code=400, detail="Name must be at least 2 characters long")
@@ -202,7 +214,7 @@ async def register(user_data: UserRegister):
         raise HTTPException(status_code=400, detail="Password must contain at least one special character")
     
     # Check if user exists
-    existing_user = await db.users.find_one({"email": user_data.email})
+    existing_user = await resources.db.users.find_one({"email": user_data.email})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
@@ -215,10 +227,10 @@ async def register(user_data: UserRegister):
     user_dict['password_hash'] = hash_password(user_data.password)
     user_dict['created_at'] = user_dict['created_at'].isoformat()
     
-    await db.users.insert_one(user_dict)
+    await resources.db.users.insert_one(user_dict)
     
     # Create token
-    token = create_access_token({"sub": user.email})
+    token = create_access_token({"sub": user.email}, resources.settings.jwt_secret)
     
     return {
         "token": token,
@@ -230,12 +242,12 @@ async def register(user_data: UserRegister):
     }
 
 @api_router.post("/auth/login")
-async def login(credentials: UserLogin):
-    user = await db.users.find_one({"email": credentials.email})
+async def login(credentials: UserLogin, resources: Resources = Depends(get_resources)):
+    user = await resources.db.users.find_one({"email": credentials.email})
     if not user or not verify_password(credentials.password, user['password_hash']):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
-    token = create_access_token({"sub": credentials.email})
+    token = create_access_token({"sub": credentials.email}, resources.settings.jwt_secret)
     
     return {
         "token": token,
@@ -254,120 +266,419 @@ async def get_me(current_user: dict = Depends(get_current_user)):
         "name": current_user['name']
     }
 
+async def analyze_content(resources: Resources, request: VerifyRequest) -> dict:
+    # Analyze with AI, claim by claim when possible
+    if resources.claims is not None:
+        try:
+            analysis = await resources.claims.analyze(request.content, request.url)
+            if analysis is not None:
+                return analysis
+        except Exception as e:
+            logging.error(f"Claim analysis error: {str(e)}")
+    return await analyze_news_with_ai(request.content, request.url, llm=resources.llm)
+
 @api_router.post("/verify")
-async def verify_news(request: VerifyRequest, current_user: dict = Depends(get_current_user)):
-    # Analyze with AI
-    analysis = await analyze_news_with_ai(request.content, request.url)
+async def verify_news(
+    request: VerifyRequest,
+    http_request: Request,
+    current_user: dict = Depends(get_current_user),
+    resources: Resources = Depends(get_resources)
+):
+    # Caches, the LLM and the stored record see the canonical content and
+    # URL, so tracking-parameter variants of one article count as one story
+    canonical = normalize_url(request.url)
+    if resources.settings.normalize_content:
+        with span("normalize"):
+            request = VerifyRequest(
+                content=normalize_content(request.content) or request.content,
+                url=normalize_url(request.url)
+            )
+    
+    # Headlines verified in the background need no LLM call at all
+    analysis = None
+    if resources.headlines is not None:
+        with span("headline_lookup"):
+            analysis = await resources.headlines.lookup(resources.db, request.content)
+    if analysis is None:
+        settings = resources.settings
+        if settings.llm_prompt_overflow == "reject" and settings.llm_prompt_budget > 0:
+            tokens = count_message_tokens(build_messages(request.content, request.url), settings.llm_model)
+            if tokens > settings.llm_prompt_budget:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Content is too long to verify ({tokens} tokens, limit {settings.llm_prompt_budget})"
+                )
+        with token_scope("verify", current_user['id']):
+            analysis = await resources.admission.run("verify", http_request, lambda: analyze_content(resources, request))
     
     # Create verification result
     result = VerificationResult(
         user_id=current_user['id'],
         content=request.content,
-        url=request.url,
+        url=canonical,
         result=analysis['result'],
         confidence=analysis['confidence'],
-        evidence=analysis['evidence']
+        evidence=analysis['evidence'],
+        claims=analysis.get('claims')
     )
     
     result_dict = result.model_dump()
     result_dict['timestamp'] = result_dict['timestamp'].isoformat()
+    result_dict['prompt_version'] = PROMPT_VERSION
+    result_dict['story_key'] = story_key(result_dict['content'], result_dict['url'])
+    if analysis.get('failed'):
+        result_dict['analysis_failed'] = True
+        expires_at = low_value_expiry(resources.settings.low_value_ttl_days)
+        if expires_at is not None:
+            result_dict['expires_at'] = expires_at
     
-    await db.verifications.insert_one(result_dict)
+    with span("db_insert"):
+        await resources.db.verifications.insert_one(await resources.bodies.store(result_dict))
+    resources.shared_cache.invalidate("trending")
+    with span("stats"):
+        await record_verification(resources.db, result_dict)
+    resources.trending.record(result_dict)
+    resources.live.publish("verifications", build_trending([result_dict]))
     
     return result
 
+VERIFICATION_FIELDS = tuple(VerificationResult.model_fields)
+
+def public_timestamp(timestamp):
+    """Stored isoformat text has a +00:00 offset where the model serializes a Z suffix"""
+    if isinstance(timestamp, str) and timestamp.endswith("+00:00"):
+        return timestamp[:-6] + "Z"
+    return timestamp
+
+def public_verifications(rows: List[dict]) -> List[dict]:
+    """Stored verifications shaped as VerificationResult JSON.
+
+    Rows also carry bookkeeping fields (prompt_version, analysis_failed,
+    expires_at, body hashes) that are not part of the API.
+    """
+    public = []
+    for row in rows:
+        item = {field: row.get(field) for field in VERIFICATION_FIELDS}
+        item["timestamp"] = public_timestamp(item["timestamp"])
+        public.append(item)
+    return public
+
 @api_router.get("/history", response_model=List[VerificationResult])
-async def get_history(current_user: dict = Depends(get_current_user)):
-    verifications = await db.verifications.find(
-        {"user_id": current_user['id']},
-        {"_id": 0}
-    ).sort("timestamp", -1).to_list(100)
+async def get_history(
+    current_user: dict = Depends(get_current_user),
+    resources: Resources = Depends(get_resources)
+):
+    # Stored rows are whitelisted to the model's fields instead of being
+    # re-validated through response_model
+    db = resources.read_db("user")
+    verifications = await find_history(db, {"user_id": current_user['id']}, 0, 100)
     
-    for verification in verifications:
-        if isinstance(verification['timestamp'], str):
-            verification['timestamp'] = datetime.fromisoformat(verification['timestamp'])
+    return TrustedJSONResponse(public_verifications(await hydrate(db, verifications)))
+
+@api_router.get("/history/stats", response_model=HistoryStats)
+async def get_history_stats(
+    days: int = Query(30, ge=1, le=365),
+    current_user: dict = Depends(get_current_user),
+    resources: Resources = Depends(get_resources)
+):
+    """Per-user verification counters maintained on insert"""
+    return TrustedJSONResponse(await get_user_stats(resources.read_db("user"), current_user['id'], days))
+
+def _as_utc_iso(value: datetime) -> str:
+    # Stored timestamps are UTC isoformat strings, so they compare as text
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+def _timestamp_range(start: Optional[datetime], end: Optional[datetime]) -> dict:
+    timestamp = {}
+    if start is not None:
+        timestamp["$gte"] = _as_utc_iso(start)
+    if end is not None:
+        timestamp["$lte"] = _as_utc_iso(end)
+    return timestamp
+
+@api_router.get("/history/search", response_model=HistorySearchPage)
+async def search_history(
+    q: Optional[str] = Query(None, max_length=200),
+    result: Optional[Literal["Real", "Fake", "Misleading"]] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=100),
+    max_confidence: Optional[float] = Query(None, ge=0, le=100),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    page: int = Query(1, ge=1, le=HISTORY_SEARCH_MAX_PAGE),
+    page_size: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user),
+    resources: Resources = Depends(get_resources)
+):
+    """Search a user's history by text, verdict, confidence and date"""
+    query = {"user_id": current_user['id']}
+    if result:
+        query["result"] = result
+    confidence = {}
+    if min_confidence is not None:
+        confidence["$gte"] = min_confidence
+    if max_confidence is not None:
+        confidence["$lte"] = max_confidence
+    if confidence:
+        query["confidence"] = confidence
+    timestamp = _timestamp_range(start, end)
+    if timestamp:
+        query["timestamp"] = timestamp
     
-    return verifications
+    db = resources.read_db("user")
+    offset = (page - 1) * page_size
+    # Fetch one extra row to know whether another page exists
+    if q and q.strip():
+        # Ranked by text score over the bodies and inline rows, best first;
+        # archived matches follow the hot ones when those do not fill the page
+        verifications = await text_search(db, query, q.strip(), offset + page_size + 1)
+        for collection in await archive_names(db, query):
+            if len(verifications) > offset + page_size:
+                break
+            verifications += await text_search(
+                db, query, q.strip(), offset + page_size + 1 - len(verifications), collection
+            )
+        verifications = verifications[offset:offset + page_size + 1]
+        for verification in verifications:
+            verification.pop("score", None)
+    else:
+        verifications = await find_history(db, query, offset, page_size + 1)
+    await hydrate(db, verifications)
+    
+    return TrustedJSONResponse({
+        "results": public_verifications(verifications[:page_size]),
+        "page": page,
+        "page_size": page_size,
+        "has_more": len(verifications) > page_size
+    })
+
+@api_router.get("/history/export")
+async def export_history(
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_user),
+    resources: Resources = Depends(get_resources)
+):
+    """Stream the caller's full history as NDJSON or CSV"""
+    query = {"user_id": current_user['id']}
+    timestamp = _timestamp_range(start, end)
+    if timestamp:
+        query["timestamp"] = timestamp
+    return export_response(resources.read_db("user"), query, fmt, "verification-history")
+
+@api_router.get("/admin/export")
+async def export_verifications(
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+    user_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    admin: dict = Depends(get_admin_user),
+    resources: Resources = Depends(get_resources)
+):
+    """Stream any user's or any time range's verifications (admins only)"""
+    query = {}
+    if user_id:
+        query["user_id"] = user_id
+    timestamp = _timestamp_range(start, end)
+    if timestamp:
+        query["timestamp"] = timestamp
+    logger.info(f"Verification export by {admin['email']}: {query}")
+    return export_response(resources.read_db("analytics"), query, fmt, "verifications")
+
+@api_router.get("/admin/metrics")
+async def get_metrics(
+    admin: dict = Depends(get_admin_user),
+    resources: Resources = Depends(get_resources)
+):
+    """Counters for tuning this worker (admins only)"""
+    return {
+        "llm": resources.llm.stats() if resources.llm else {},
+        "claims": resources.claims.counts if resources.claims else {},
+        "live": resources.live.stats(),
+        "headlines": resources.headlines.stats() if resources.headlines else {},
+        "admission": resources.admission.stats(),
+        "tokens": resources.tokens.stats(),
+        "faq": resources.faq.stats() if resources.faq else {}
+    }
 
-@api_router.get("/trending", response_model=List[TrendingNews])
-async def get_trending():
-    # Get recent verifications from all users
-    verifications = await db.verifications.find(
-        {},
-        {"_id": 0}
-    ).sort("timestamp", -1).limit(20).to_list(20)
+@api_router.get("/admin/profile")
+async def profile_worker(
+    seconds: float = Query(10, ge=1, le=60),
+    interval_ms: float = Query(5, ge=1, le=100),
+    fmt: Literal["speedscope", "collapsed"] = Query("speedscope", alias="format"),
+    admin: dict = Depends(get_admin_user)
+):
+    """Sample the event loop of the worker serving this request (admins only)"""
+    try:
+        profiler, loop_lag = await profile_event_loop(seconds, interval_ms / 1000)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="A profile is already running on this worker")
     
+    headers = {
+        "X-Worker-Pid": str(os.getpid()),
+        "X-Profile-Samples": str(profiler.samples),
+        "X-Event-Loop-Lag": dumps(loop_lag).decode()
+    }
+    if fmt == "collapsed":
+        return PlainTextResponse(to_collapsed(profiler), headers=headers)
+    profile = to_speedscope(profiler, f"worker {os.getpid()}")
+    profile["loop_lag"] = loop_lag
+    return TrustedJSONResponse(profile, headers=headers)
+
+def build_trending(verifications: List[dict]) -> List[dict]:
+    """Shape recent verifications as TrendingNews payloads"""
     trending = []
     for v in verifications:
         # Extract title from content (first 100 chars)
-        title = v['content'][:100] + "..." if len(v['content']) > 100 else v['content']
-        source = v.get('url') or 'User Submission'
-        
-        trending_item = TrendingNews(
-            title=title,
-            source=source,
-            status=v['result'],
-            confidence=v['confidence'],
-            verified_at=datetime.fromisoformat(v['timestamp']) if isinstance(v['timestamp'], str) else v['timestamp']
-        )
-        trending.append(trending_item)
-    
+        content = v['content']
+        title = content[:100] + "..." if len(content) > 100 else content
+        trending.append({
+            "id": v.get('id') or str(uuid.uuid4()),
+            "title": title,
+            "source": v.get('url') or 'User Submission',
+            "status": v['result'],
+            "confidence": v['confidence'],
+            "verified_at": public_timestamp(v['timestamp'])
+        })
     return trending
 
+async def load_trending(resources: Resources) -> bytes:
+    # Get recent verifications from all users
+    db = resources.read_db("public")
+    verifications = await db.verifications.find(
+        {},
+        {"_id": 0, "id": 1, "content": 1, "content_hash": 1, "url": 1, "result": 1, "confidence": 1, "timestamp": 1}
+    ).sort("timestamp", -1).limit(TRENDING_LIMIT).to_list(TRENDING_LIMIT)
+    return dumps(build_trending(await hydrate(db, verifications, ("content",))))
+
+@api_router.get("/trending", response_model=List[TrendingNews])
+async def get_trending(resources: Resources = Depends(get_resources)):
+    body = await resources.shared_cache.get_or_fill(
+        "trending",
+        resources.settings.trending_cache_ttl,
+        lambda: load_trending(resources)
+    )
+    
+    return TrustedJSONResponse(body)
+
+@api_router.get("/trending/top", response_model=List[TrendingStory])
+async def get_trending_top(
+    window: Literal["1h", "24h"] = "24h",
+    limit: int = Query(20, ge=1, le=50),
+    resources: Resources = Depends(get_resources)
+):
+    """Most submitted stories over a sliding window, served from memory"""
+    return TrustedJSONResponse(resources.trending.ranking(window, limit))
+
+@api_router.get("/trending/live")
+async def get_trending_live(resources: Resources = Depends(get_resources)):
+    """Server-sent events: the current feed, then new verifications and news pages as they land"""
+    if resources.live.full:
+        raise HTTPException(status_code=503, detail="Too many live connections")
+    snapshot = await resources.shared_cache.get_or_fill(
+        "trending",
+        resources.settings.trending_cache_ttl,
+        lambda: load_trending(resources)
+    )
+    return StreamingResponse(
+        resources.live.stream(encode_event("trending", snapshot)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def fetch_news(resources: Resources, category: NewsCategory, page: int) -> dict:
+    """Fetch and format one page of top headlines from NewsAPI"""
+    # NewsAPI endpoint for top headlines
+    url = "https://newsapi.org/v2/top-headlines"
+    
+    params = {
+        "apiKey": resources.settings.news_api_key,
+        "country": "us",
+        "pageSize": 20,
+        "page": page
+    }
+    
+    # Add category filter if not "all"
+    if category != "all":
+        params["category"] = category
+    
+    started = time.perf_counter()
+    try:
+        with span("newsapi"):
+            response = await resources.http.get(url, params=params)
+    except httpx.HTTPError as e:
+        resources.newsapi_latency.record(time.perf_counter() - started, str(e) or type(e).__name__)
+        raise
+    resources.newsapi_latency.record(
+        time.perf_counter() - started,
+        None if response.status_code == 200 else f"HTTP {response.status_code}"
+    )
+    
+    if response.status_code != 200:
+        logging.error(f"NewsAPI error: {response.text}")
+        raise HTTPException(status_code=response.status_code, detail="Failed to fetch news")
+    
+    data = response.json()
+    
+    if data.get("status") != "ok":
+        raise HTTPException(status_code=500, detail="NewsAPI returned error")
+    
+    articles = data.get("articles", [])
+    
+    # Format articles
+    formatted_articles = []
+    for article in articles:
+        formatted_articles.append({
+            "title": article.get("title", "No title"),
+            "description": article.get("description", ""),
+            "url": article.get("url", ""),
+            "urlToImage": article.get("urlToImage", ""),
+            "publishedAt": article.get("publishedAt", ""),
+            "source": article.get("source", {}),
+            "category": category if category != "all" else "general"
+        })
+    
+    return {
+        "articles": formatted_articles,
+        "totalResults": data.get("totalResults", 0)
+    }
+
+async def load_news(resources: Resources, category: NewsCategory, page: int) -> bytes:
+    news = await fetch_news(resources, category, page)
+    if resources.headlines is not None:
+        # Verdicts found later are patched into the cached page as they land
+        await resources.headlines.attach(resources.read_db("public"), news["articles"])
+        resources.remember_news_page(f"news:{category}:{page}", news["articles"])
+        resources.headlines.submit(news["articles"])
+    resources.relay.publish("news", dict(news, category=category, page=page))
+    return dumps(news)
+
 @api_router.get("/news")
-async def get_real_news(category: Optional[str] = "general", page: int = 1):
+async def get_real_news(
+    category: NewsCategory = "general",
+    page: int = Query(1, ge=1, le=NEWS_MAX_PAGE),
+    resources: Resources = Depends(get_resources)
+):
     """Fetch real-time news from NewsAPI"""
     try:
-        news_api_key = os.environ.get('NEWS_API_KEY')
-        if not news_api_key:
+        if not resources.settings.news_api_key:
             raise HTTPException(status_code=500, detail="News API key not configured")
         
-        # NewsAPI endpoint for top headlines
-        url = "https://newsapi.org/v2/top-headlines"
-        
-        params = {
-            "apiKey": news_api_key,
-            "country": "us",
-            "pageSize": 20,
-            "page": page
-        }
-        
-        # Add category filter if not "all"
-        if category and category != "all":
-            params["category"] = category
-        
-        response = requests.get(url, params=params)
-        
-        if response.status_code != 200:
-            logging.error(f"NewsAPI error: {response.text}")
-            raise HTTPException(status_code=response.status_code, detail="Failed to fetch news")
-        
-        data = response.json()
+        # One worker per host refreshes a page; the rest share its encoded body
+        with span("news_cache"):
+            body = await resources.shared_cache.get_or_fill(
+                f"news:{category}:{page}",
+                resources.settings.news_cache_ttl,
+                lambda: load_news(resources, category, page)
+            )
         
-        if data.get("status") != "ok":
-            raise HTTPException(status_code=500, detail="NewsAPI returned error")
+        return TrustedJSONResponse(body)
         
-        articles = data.get("articles", [])
-        
-        # Format articles
-        formatted_articles = []
-        for article in articles:
-            formatted_articles.append({
-                "title": article.get("title", "No title"),
-                "description": article.get("description", ""),
-                "url": article.get("url", ""),
-                "urlToImage": article.get("urlToImage", ""),
-                "publishedAt": article.get("publishedAt", ""),
-                "source": article.get("source", {}),
-                "category": category if category != "all" else "general"
-            })
-        
-        return {
-            "articles": formatted_articles,
-            "totalResults": data.get("totalResults", 0)
-        }
-        
-    except requests.RequestException as e:
+    except HTTPException:
+        raise
+    except httpx.HTTPError as e:
         logging.error(f"News API request error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch news from external API")
     except Exception as e:
@@ -388,57 +699,32 @@ class NewsArticle(BaseModel):
     category: Optional[str] = "general"
 
 @api_router.post("/chatbot")
-async def chatbot(request: ChatbotRequest):
+async def chatbot(
+    request: ChatbotRequest,
+    http_request: Request,
+    resources: Resources = Depends(get_resources)
+):
     """Chatbot endpoint trained on TruthGuard platform knowledge"""
+    if resources.faq is not None:
+        answer = resources.faq.answer(request.message, request.history)
+        if answer is not None:
+            return {"response": answer}
     try:
-        api_key = os.environ.get('OPENAI_API_KEY')
-        if not api_key:
+        llm = resources.llm
+        if llm is None:
             raise Exception("OpenAI API key not configured")
         
-        client = AsyncOpenAI(api_key=api_key)
-        
-        system_message = """You are TruthGuard Assistant, a helpful AI chatbot for the TruthGuard fake news detection platform.
-
-ABOUT TRUTHGUARD:
-- TruthGuard is an AI-powered fake news detection system
-- Users can verify news headlines, articles, or URLs for authenticity
-- Classification system: Real (verified), Misleading (partially true), or Fake (false)
-- Each verification includes confidence scores (0-100%) and detailed evidence
-
-KEY FEATURES:
-1. Real-Time Detection: Instant AI-powered news verification
-2. AI Fact Verification: Uses OpenAI GPT-4o-mini for advanced analysis
-3. Confidence Scoring: Detailed scores with evidence-based reasoning
-4. History Tracking: Users can view past verifications
-5. Trending News: Real-time news from around the world with category filters
-6. Trending Verifications: Community-wide recent verifications with filters
-
-HOW IT WORKS:
-1. User inputs news content or URL
-2. AI analyzes content and cross-references information
-3. NLP model classifies as Real/Misleading/Fake
-4. System displays result with confidence score and evidence
-
-TECHNOLOGY:
-- Powered by OpenAI's GPT-4o-mini
-- FastAPI backend with MongoDB database
-- React frontend with modern UI
-- JWT authentication for secure access
-- NewsAPI integration for real-time news
-
-AUTHENTICATION:
-- Users can sign up with email and password
-- Login required for verification and history features
-- Trending and About pages are public
-
-Your role is to:
-- Answer questions about the platform
-- Help users understand how to use TruthGuard
-- Explain the verification process
-- Provide information about fake news detection
-- Be friendly, helpful, and concise
-
-Keep responses clear and under 150 words unless detailed explanation is needed."""
+        # Only the knowledge relevant to this turn goes into the prompt
+        with span("retrieve"):
+            last_question = next(
+                (msg.get("content", "") for msg in reversed(request.history or []) if msg.get("role", "user") == "user"),
+                ""
+            )
+            snippets = resources.knowledge.search(
+                f"{request.message} {last_question}",
+                k=resources.settings.chatbot_snippets
+            )
+        system_message = build_system_prompt(snippets)
         
         # Build messages with history
         messages = [{"role": "system", "content": system_message}]
@@ -454,31 +740,27 @@ Keep responses clear and under 150 words unless detailed explanation is needed."
         # Add current message
         messages.append({"role": "user", "content": request.message})
         
-        response = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=300
-        )
+        async def complete():
+            with span("llm"):
+                return await llm.complete(
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=300
+                )
         
+        with token_scope("chatbot"):
+            response = await resources.admission.run("chatbot", http_request, complete)
         response_text = response.choices[0].message.content.strip()
         
         return {"response": response_text}
+    except (Overloaded, ClientDisconnected):
+        raise
+    except PromptTooLarge:
+        raise HTTPException(status_code=413, detail="Message is too long")
     except Exception as e:
         logging.error(f"Chatbot error: {str(e)}")
         return {"response": "I apologize, but I'm having trouble processing your request right now. Please try again in a moment."}
 
-# Include the router in the main app
-app.include_router(api_router)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -486,6 +768,128 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+async def warm_caches(resources: Resources) -> None:
+    """Prime the shared caches; only the first worker on a host does the work"""
+    settings = resources.settings
+    readiness = resources.readiness
+    if readiness.done("mongo"):
+        await readiness.run("trending", lambda: resources.trending.sync(resources.read_db("analytics")))
+        await readiness.run("trending_cache", lambda: resources.shared_cache.get_or_fill(
+            "trending", settings.trending_cache_ttl, lambda: load_trending(resources)
+        ))
+    else:
+        # Each would wait out the server selection timeout too;
+        # keep_warming runs them once Mongo answers
+        readiness.expect("trending", "trending_cache")
+    if resources.llm is not None:
+        # Until then token counts are estimated
+        await readiness.run("tokenizer", lambda: preload_encoding(settings.llm_model), optional=True)
+    if settings.news_api_key and readiness.done("mongo"):
+        # NewsAPI being down must not take every worker out of rotation
+        await readiness.run("news_cache", lambda: resources.shared_cache.get_or_fill(
+            "news:general:1", settings.news_cache_ttl, lambda: load_news(resources, "general", 1)
+        ), optional=True)
+
+async def keep_warming(resources: Resources) -> None:
+    """Retry failed warm-up steps until the worker is ready"""
+    while not resources.readiness.ready:
+        await asyncio.sleep(resources.settings.warm_up_retry_interval)
+        await resources.warm_up()
+        await warm_caches(resources)
+    logger.info("Warm-up complete")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open and warm the shared pools before serving, close them on shutdown"""
+    resources = Resources(app.state.settings)
+    await resources.open()
+    await warm_caches(resources)
+    app.state.resources = resources
+    # Verifications stored by other workers reach this worker's watchers here
+    resources.start_task(resources.trending.run(
+        resources.read_db("analytics"),
+        resources.settings.trending_sync_interval,
+        on_new=lambda verifications: resources.live.publish("verifications", build_trending(verifications))
+    ))
+    resources.start_task(resources.tokens.run(resources.db, resources.settings.token_flush_interval))
+    # News pages and headline verdicts reach other workers' watchers here
+    resources.start_task(resources.relay.run(resources.settings.live_relay_interval))
+    resources.start_task(resources.shared_cache.run(
+        resources.settings.shared_cache_sweep_interval, stale_for=resources.settings.shared_cache_sweep_interval
+    ))
+    if not resources.readiness.ready:
+        resources.start_task(keep_warming(resources))
+    if resources.headlines is not None:
+        resources.start_task(resources.headlines.run())
+    if resources.settings.hot_retention_days > 0:
+        archiver = Archiver(resources.db, resources.settings.hot_retention_days)
+        resources.start_task(archiver.run(resources.settings.archive_interval))
+    try:
+        yield
+    finally:
+        await resources.close()
+
+async def overloaded_handler(request: Request, exc: Overloaded) -> ORJSONResponse:
+    return ORJSONResponse(
+        {"detail": "Server is busy, please retry shortly"},
+        status_code=503,
+        headers={"Retry-After": retry_after_header(exc)}
+    )
+
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected) -> Response:
+    # Nobody is listening; 499 only shows up in logs and metrics
+    return Response(status_code=499)
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    settings = settings or Settings.from_env()
+    if settings.slow_request_log:
+        configure_slow_log(settings.slow_request_log)
+
+    # Create the main app without a prefix
+    app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+    app.state.settings = settings
+
+    # Include the router in the main app
+    app.include_router(api_router)
+    app.add_exception_handler(Overloaded, overloaded_handler)
+    app.add_exception_handler(ClientDisconnected, client_disconnected_handler)
+
+    # Read-only endpoints answer If-None-Match with 304; bodies above the
+    # threshold are gzip/brotli compressed
+    app.add_middleware(ConditionalGetMiddleware, paths=("/api/news", "/api/trending", "/api/history"))
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_size)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=settings.cors_origins,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["Server-Timing"],
+    )
+
+    if settings.capture_path:
+        app.add_middleware(
+            CaptureMiddleware,
+            path=settings.capture_path,
+            sample_rate=settings.capture_sample_rate,
+            max_body=settings.capture_max_body
+        )
+
+    # Outermost, so the total covers every other middleware
+    app.add_middleware(
+        ServerTimingMiddleware,
+        slow_ms=settings.slow_request_ms,
+        sample_rate=settings.slow_request_sample_rate
+    )
+
+    return app
+
+def __getattr__(name: str):
+    # `uvicorn server:app` builds the app when it is first looked up, so
+    # importing server reads no settings; `uvicorn --factory
+    # server:create_app` is equivalent
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
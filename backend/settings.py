@@ -0,0 +1,194 @@
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Runtime configuration, read once per app from the environment"""
+
+    mongo_url: str
+    db_name: str
+    cors_origins: List[str] = field(default_factory=lambda: ["*"])
+    openai_api_key: str = ""
+    news_api_key: str = ""
+    jwt_secret: str = "your-secret-key"
+    admin_emails: List[str] = field(default_factory=list)
+    trending_cache_ttl: float = 5.0
+    news_cache_ttl: float = 300.0
+    # Defaults to a tmpfs directory named after db_name
+    shared_cache_dir: str = ""
+    cache_version: str = "1"
+    # How often expired shared cache entries and their lock files are deleted
+    shared_cache_sweep_interval: float = 300.0
+    trending_top_k: int = 50
+    trending_sync_interval: float = 5.0
+    compression_min_size: int = 1024
+    slow_request_ms: float = 2000.0
+    slow_request_sample_rate: float = 1.0
+    slow_request_log: str = ""
+    # Sanitized JSONL record of sampled requests for traffic_replay.py
+    # (empty disables capture)
+    capture_path: str = ""
+    capture_sample_rate: float = 1.0
+    capture_max_body: int = 65536
+    http_timeout: float = 10.0
+    llm_timeout: float = 30.0
+    llm_model: str = "gpt-4o-mini"
+    # Optional alternate route for hedging and failover
+    llm_fallback_model: str = ""
+    llm_fallback_base_url: str = ""
+    llm_fallback_api_key: str = ""
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_min_samples: int = 20
+    llm_error_rate_threshold: float = 0.5
+    llm_failover_cooldown: float = 30.0
+    mongo_connect_timeout_ms: int = 5000
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_max_idle_time_ms: int = 0
+    mongo_wait_queue_timeout_ms: int = 0
+    # Read preference per query class, see Resources.read_db. Against a local
+    # single-host replica set (mongod --replSet rs0, rs.initiate(), and
+    # ?replicaSet=rs0 in MONGO_URL) secondaryPreferred falls back to primary.
+    read_preference_public: str = "secondaryPreferred"
+    read_preference_analytics: str = "secondaryPreferred"
+    read_preference_user: str = "primary"
+    # At least 90, or -1 for no limit; other values fail at startup
+    max_staleness_seconds: int = 90
+    # Canonicalize submitted content (NFKC, boilerplate, repeats, tracking
+    # URLs) before caching and analysis
+    normalize_content: bool = True
+    # Verify articles claim by claim, reusing cached claim verdicts. Costs an
+    # extraction call plus one call per new claim, so it is opt-in and only
+    # used for content of at least claim_min_words words
+    claim_pipeline: bool = False
+    claim_min_words: int = 80
+    claim_max_claims: int = 8
+    claim_concurrency: int = 4
+    claim_cache_ttl_days: float = 30.0
+    # "zstd" compresses stored bodies of at least body_compress_min_size bytes
+    body_compression: str = ""
+    body_compress_min_size: int = 2048
+    # Verifications older than this move to monthly archive collections (0 keeps
+    # everything hot); failed analyses expire after low_value_ttl_days
+    hot_retention_days: float = 180.0
+    archive_interval: float = 3600.0
+    low_value_ttl_days: float = 7.0
+    # /api/trending/live server-sent events, per worker
+    live_buffer_size: int = 64
+    live_heartbeat: float = 15.0
+    live_max_subscribers: int = 10000
+    # How often news and headline events are exchanged with other workers
+    live_relay_interval: float = 1.0
+    # Background verification of NewsAPI headlines; the budget is LLM calls
+    # per UTC day across all workers
+    headline_auto_verify: bool = True
+    headline_concurrency: int = 2
+    headline_daily_budget: int = 500
+    # Admission control for LLM-backed requests: at most llm_max_concurrency run
+    # at once, the rest queue per lane (verify before chatbot) up to a bound
+    # and are shed with 503 once their expected wait passes the deadline
+    llm_max_concurrency: int = 16
+    verify_queue_size: int = 64
+    verify_deadline: float = 20.0
+    chatbot_queue_size: int = 32
+    chatbot_deadline: float = 10.0
+    # Prompt budget in tokens (0 disables); over it, the user's text is
+    # truncated or, with LLM_PROMPT_OVERFLOW=reject, the request refused
+    llm_prompt_budget: int = 6000
+    llm_prompt_overflow: str = "truncate"
+    token_flush_interval: float = 30.0
+    # Knowledge documents retrieved into each chatbot prompt
+    chatbot_snippets: int = 3
+    # Common chatbot questions matching a FAQ at least this closely (cosine
+    # similarity) are answered without the LLM
+    chatbot_faq: bool = True
+    chatbot_faq_threshold: float = 0.7
+    # /api/health/ready: Mongo ping timeout, and how often a worker whose
+    # warm-up failed retries it
+    health_ping_timeout: float = 2.0
+    warm_up_retry_interval: float = 5.0
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_dotenv(ROOT_DIR / '.env')
+        env = os.environ
+        return cls(
+            mongo_url=env['MONGO_URL'],
+            db_name=env['DB_NAME'],
+            cors_origins=env.get('CORS_ORIGINS', '*').split(','),
+            openai_api_key=env.get('OPENAI_API_KEY', ''),
+            news_api_key=env.get('NEWS_API_KEY', ''),
+            jwt_secret=env.get('JWT_SECRET', 'your-secret-key'),
+            admin_emails=[e.strip().lower() for e in env.get('ADMIN_EMAILS', '').split(',') if e.strip()],
+            trending_cache_ttl=float(env.get('TRENDING_CACHE_TTL', '5')),
+            news_cache_ttl=float(env.get('NEWS_CACHE_TTL', '300')),
+            shared_cache_dir=env.get('SHARED_CACHE_DIR', ''),
+            cache_version=env.get('CACHE_VERSION', '1'),
+            shared_cache_sweep_interval=float(env.get('SHARED_CACHE_SWEEP_INTERVAL', '300')),
+            trending_top_k=int(env.get('TRENDING_TOP_K', '50')),
+            trending_sync_interval=float(env.get('TRENDING_SYNC_INTERVAL', '5')),
+            compression_min_size=int(env.get('COMPRESSION_MIN_SIZE', '1024')),
+            slow_request_ms=float(env.get('SLOW_REQUEST_MS', '2000')),
+            slow_request_sample_rate=float(env.get('SLOW_REQUEST_SAMPLE_RATE', '1')),
+            slow_request_log=env.get('SLOW_REQUEST_LOG', ''),
+            capture_path=env.get('CAPTURE_PATH', ''),
+            capture_sample_rate=float(env.get('CAPTURE_SAMPLE_RATE', '1')),
+            capture_max_body=int(env.get('CAPTURE_MAX_BODY', '65536')),
+            http_timeout=float(env.get('HTTP_TIMEOUT', '10')),
+            llm_timeout=float(env.get('LLM_TIMEOUT', '30')),
+            llm_model=env.get('LLM_MODEL', 'gpt-4o-mini'),
+            llm_fallback_model=env.get('LLM_FALLBACK_MODEL', ''),
+            llm_fallback_base_url=env.get('LLM_FALLBACK_BASE_URL', ''),
+            llm_fallback_api_key=env.get('LLM_FALLBACK_API_KEY', ''),
+            llm_hedge_percentile=float(env.get('LLM_HEDGE_PERCENTILE', '0.95')),
+            llm_hedge_min_samples=int(env.get('LLM_HEDGE_MIN_SAMPLES', '20')),
+            llm_error_rate_threshold=float(env.get('LLM_ERROR_RATE_THRESHOLD', '0.5')),
+            llm_failover_cooldown=float(env.get('LLM_FAILOVER_COOLDOWN', '30')),
+            mongo_connect_timeout_ms=int(env.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+            mongo_max_pool_size=int(env.get('MONGO_MAX_POOL_SIZE', '100')),
+            mongo_min_pool_size=int(env.get('MONGO_MIN_POOL_SIZE', '0')),
+            mongo_max_idle_time_ms=int(env.get('MONGO_MAX_IDLE_TIME_MS', '0')),
+            mongo_wait_queue_timeout_ms=int(env.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '0')),
+            read_preference_public=env.get('READ_PREFERENCE_PUBLIC', 'secondaryPreferred'),
+            read_preference_analytics=env.get('READ_PREFERENCE_ANALYTICS', 'secondaryPreferred'),
+            read_preference_user=env.get('READ_PREFERENCE_USER', 'primary'),
+            max_staleness_seconds=int(env.get('MAX_STALENESS_SECONDS', '90')),
+            normalize_content=env.get('NORMALIZE_CONTENT', '1') not in ('0', 'false', 'False', ''),
+            claim_pipeline=env.get('CLAIM_PIPELINE', '0') not in ('0', 'false', 'False', ''),
+            claim_min_words=int(env.get('CLAIM_MIN_WORDS', '80')),
+            claim_max_claims=int(env.get('CLAIM_MAX_CLAIMS', '8')),
+            claim_concurrency=int(env.get('CLAIM_CONCURRENCY', '4')),
+            claim_cache_ttl_days=float(env.get('CLAIM_CACHE_TTL_DAYS', '30')),
+            body_compression=env.get('BODY_COMPRESSION', ''),
+            body_compress_min_size=int(env.get('BODY_COMPRESS_MIN_SIZE', '2048')),
+            hot_retention_days=float(env.get('HOT_RETENTION_DAYS', '180')),
+            archive_interval=float(env.get('ARCHIVE_INTERVAL', '3600')),
+            low_value_ttl_days=float(env.get('LOW_VALUE_TTL_DAYS', '7')),
+            live_buffer_size=int(env.get('LIVE_BUFFER_SIZE', '64')),
+            live_heartbeat=float(env.get('LIVE_HEARTBEAT', '15')),
+            live_max_subscribers=int(env.get('LIVE_MAX_SUBSCRIBERS', '10000')),
+            live_relay_interval=float(env.get('LIVE_RELAY_INTERVAL', '1')),
+            headline_auto_verify=env.get('HEADLINE_AUTO_VERIFY', '1') not in ('0', 'false', 'False', ''),
+            headline_concurrency=int(env.get('HEADLINE_CONCURRENCY', '2')),
+            headline_daily_budget=int(env.get('HEADLINE_DAILY_BUDGET', '500')),
+            llm_max_concurrency=int(env.get('LLM_MAX_CONCURRENCY', '16')),
+            verify_queue_size=int(env.get('VERIFY_QUEUE_SIZE', '64')),
+            verify_deadline=float(env.get('VERIFY_DEADLINE', '20')),
+            chatbot_queue_size=int(env.get('CHATBOT_QUEUE_SIZE', '32')),
+            chatbot_deadline=float(env.get('CHATBOT_DEADLINE', '10')),
+            llm_prompt_budget=int(env.get('LLM_PROMPT_BUDGET', '6000')),
+            llm_prompt_overflow=env.get('LLM_PROMPT_OVERFLOW', 'truncate'),
+            token_flush_interval=float(env.get('TOKEN_FLUSH_INTERVAL', '30')),
+            chatbot_snippets=int(env.get('CHATBOT_SNIPPETS', '3')),
+            chatbot_faq=env.get('CHATBOT_FAQ', '1') not in ('0', 'false', 'False', ''),
+            chatbot_faq_threshold=float(env.get('CHATBOT_FAQ_THRESHOLD', '0.7')),
+            health_ping_timeout=float(env.get('HEALTH_PING_TIMEOUT', '2')),
+            warm_up_retry_interval=float(env.get('WARM_UP_RETRY_INTERVAL', '5')),
+        )
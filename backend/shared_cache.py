@@ -0,0 +1,234 @@
+import asyncio
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+from typing import Awaitable, Callable, Optional, Tuple
+
+# magic, expires_at (epoch seconds), body length
+HEADER = struct.Struct("<4sdQ")
+MAGIC = b"TGC1"
+LOCK_SUFFIX = ".lock"
+TMP_PREFIX = ".tmp-"
+
+logger = logging.getLogger(__name__)
+
+
+def _mtime(entry: os.DirEntry) -> float:
+    try:
+        return entry.stat().st_mtime
+    except FileNotFoundError:
+        return float("inf")
+
+
+def _unlink(path: str) -> int:
+    try:
+        os.unlink(path)
+        return 1
+    except FileNotFoundError:
+        return 0
+
+
+def default_cache_dir(namespace: str = "") -> str:
+    # /dev/shm is tmpfs: entries live in shared memory, not on disk
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    # Apps on one host serving different databases must not share bodies
+    suffix = re.sub(r"[^A-Za-z0-9_.-]", "_", namespace)
+    return os.path.join(base, f"truthguard-cache-{suffix}" if suffix else "truthguard-cache")
+
+
+class SharedBodyCache:
+    """Pre-serialized response bodies shared by every worker process on a host.
+
+    Each entry is a small file in a tmpfs directory holding a header with its
+    expiry time followed by the encoded body. Readers mmap the file, so all
+    workers share the same page-cache copy and memory does not grow with the
+    worker count. Writers replace entries atomically with os.replace, and a
+    per-key flock lets exactly one worker refill an expired entry while the
+    others keep serving the stale body.
+
+    Keys are namespaced by `version`; bump it whenever a payload shape
+    changes so old bodies are never served by new code.
+    """
+
+    def __init__(self, directory: Optional[str] = None, version: str = "1"):
+        self.directory = directory or default_cache_dir()
+        self.version = version
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(f"v{self.version}:{key}".encode()).hexdigest()
+        return os.path.join(self.directory, digest)
+
+    def _read(self, key: str) -> Optional[Tuple[float, bytes]]:
+        try:
+            with open(self._path(key), "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    magic, expires_at, length = HEADER.unpack_from(mapped, 0)
+                    if magic != MAGIC or HEADER.size + length > len(mapped):
+                        return None
+                    return expires_at, mapped[HEADER.size:HEADER.size + length]
+        except (FileNotFoundError, ValueError, struct.error):
+            # Missing, empty or truncated entry
+            return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the body if present and not expired"""
+        entry = self._read(key)
+        if entry is None or entry[0] < time.time():
+            return None
+        return entry[1]
+
+    def _write(self, key: str, body: bytes, expires_at: float) -> bytes:
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(HEADER.pack(MAGIC, expires_at, len(body)))
+                f.write(body)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return body
+
+    def set(self, key: str, body: bytes, ttl: float) -> bytes:
+        return self._write(key, body, time.time() + ttl)
+
+    def update(self, key: str, transform: Callable[[bytes], bytes]) -> bool:
+        """Rewrite a fresh entry in place, keeping its expiry.
+
+        Skipped, returning False, when the entry is missing or expired or
+        another worker is refilling it; a refill sees the same data anyway.
+        """
+        lock_fd = os.open(self._path(key) + LOCK_SUFFIX, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            try:
+                entry = self._read(key)
+                if entry is None or entry[0] < time.time():
+                    return False
+                self._write(key, transform(entry[1]), entry[0])
+                return True
+            finally:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
+        finally:
+            os.close(lock_fd)
+
+    def invalidate(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def sweep(self, stale_for: float) -> int:
+        """Delete entries expired more than `stale_for` seconds ago, lock files
+        of deleted entries and temporary files left by crashed writers.
+
+        Returns the number of files deleted.
+        """
+        cutoff = time.time() - stale_for
+        with os.scandir(self.directory) as scan:
+            files = [entry for entry in scan if entry.is_file(follow_symlinks=False)]
+        deleted = 0
+        for entry in files:
+            if entry.name.startswith(TMP_PREFIX):
+                if _mtime(entry) < cutoff:
+                    deleted += _unlink(entry.path)
+            elif entry.name.endswith(LOCK_SUFFIX):
+                path = entry.path[:-len(LOCK_SUFFIX)]
+                if _mtime(entry) < cutoff and not os.path.exists(path):
+                    deleted += self._delete_unlocked(path, entry=False)
+            else:
+                expires_at = self._read_header(entry.path)
+                if expires_at is None or expires_at < cutoff:
+                    deleted += self._delete_unlocked(entry.path)
+        return deleted
+
+    def _read_header(self, path: str) -> Optional[float]:
+        try:
+            with open(path, "rb") as f:
+                magic, expires_at, _ = HEADER.unpack(f.read(HEADER.size))
+        except (FileNotFoundError, struct.error):
+            return None
+        return expires_at if magic == MAGIC else None
+
+    def _delete_unlocked(self, path: str, entry: bool = True) -> int:
+        """Delete an entry and its lock file unless a worker is refilling it.
+
+        A worker that opened the lock file just before it is deleted may
+        refill alongside one that creates a new lock file; entries are
+        replaced atomically, so that only costs a duplicate fill.
+        """
+        lock_path = path + LOCK_SUFFIX
+        try:
+            lock_fd = os.open(lock_path, os.O_RDWR)
+        except FileNotFoundError:
+            return _unlink(path) if entry else 0
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            return (_unlink(path) if entry else 0) + _unlink(lock_path)
+        finally:
+            os.close(lock_fd)
+
+    async def run(self, interval: float, stale_for: float) -> None:
+        """Sweep the directory every `interval` seconds"""
+        while True:
+            try:
+                deleted = await asyncio.to_thread(self.sweep, stale_for)
+                if deleted:
+                    logger.info(f"Swept {deleted} shared cache files")
+            except OSError as e:
+                logger.warning(f"Shared cache sweep failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def get_or_fill(
+        self,
+        key: str,
+        ttl: float,
+        fill: Callable[[], Awaitable[bytes]],
+        wait_timeout: float = 2.0,
+    ) -> bytes:
+        """Return a fresh body, refilling it at most once per host when expired"""
+        entry = self._read(key)
+        now = time.time()
+        if entry is not None and entry[0] >= now:
+            return entry[1]
+
+        lock_fd = os.open(self._path(key) + LOCK_SUFFIX, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another worker is refilling: serve stale, or wait for its result
+                if entry is not None:
+                    return entry[1]
+                deadline = time.monotonic() + wait_timeout
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                    body = self.get(key)
+                    if body is not None:
+                        return body
+                return self.set(key, await fill(), ttl)
+
+            try:
+                # The previous holder may have refilled it while we checked
+                body = self.get(key)
+                if body is not None:
+                    return body
+                return self.set(key, await fill(), ttl)
+            finally:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
+        finally:
+            os.close(lock_fd)
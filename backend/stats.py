@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from archive import HOT_COLLECTION, archive_names
+
+CLASSIFICATIONS = ("Real", "Fake", "Misleading")
+
+
+def _classification(result: str) -> str:
+    # Counter names become field paths, so never use raw model output
+    return result if result in CLASSIFICATIONS else "Other"
+
+
+def _day(timestamp) -> str:
+    if isinstance(timestamp, datetime):
+        return timestamp.date().isoformat()
+    return str(timestamp)[:10]
+
+
+async def record_verification(db, verification: dict) -> None:
+    """Fold one stored verification into its owner's counters"""
+    await db.user_stats.update_one(
+        {"user_id": verification['user_id']},
+        {
+            "$inc": {
+                "total": 1,
+                f"results.{_classification(verification['result'])}": 1,
+                "confidence_sum": verification['confidence'],
+                f"days.{_day(verification['timestamp'])}": 1,
+            },
+            "$setOnInsert": {"tracking_since": verification['timestamp']},
+        },
+        upsert=True
+    )
+
+
+async def backfill_user_stats(db, user_id: str, stats: dict) -> None:
+    """Count verifications stored before counters existed for this user.
+
+    Runs once per user: everything older than `tracking_since` is aggregated
+    and added to the counters, which are then flagged as backfilled.
+    """
+    before = (stats or {}).get('tracking_since') or datetime.now(timezone.utc).isoformat()
+    increments = {}
+    pipeline = [
+        {"$match": {"user_id": user_id, "timestamp": {"$lt": before}}},
+        {"$group": {
+            "_id": {"result": "$result", "day": {"$substrBytes": ["$timestamp", 0, 10]}},
+            "count": {"$sum": 1},
+            "confidence_sum": {"$sum": "$confidence"},
+        }},
+    ]
+    for collection in [HOT_COLLECTION] + await archive_names(db, {"timestamp": {"$lt": before}}):
+        async for group in db[collection].aggregate(pipeline):
+            count = group['count']
+            result = _classification(group['_id']['result'])
+            day = group['_id']['day']
+            increments['total'] = increments.get('total', 0) + count
+            increments[f"results.{result}"] = increments.get(f"results.{result}", 0) + count
+            increments['confidence_sum'] = increments.get('confidence_sum', 0) + group['confidence_sum']
+            increments[f"days.{day}"] = increments.get(f"days.{day}", 0) + count
+
+    update = {"$set": {"backfilled": True}, "$setOnInsert": {"tracking_since": before}}
+    if increments:
+        update["$inc"] = increments
+    try:
+        await db.user_stats.update_one(
+            {"user_id": user_id, "backfilled": {"$ne": True}},
+            update,
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # A concurrent request already backfilled this user
+        pass
+
+
+async def get_user_stats(db, user_id: str, days: int = 30) -> dict:
+    stats = await db.user_stats.find_one({"user_id": user_id}, {"_id": 0})
+    if stats is None or not stats.get('backfilled'):
+        await backfill_user_stats(db, user_id, stats)
+        stats = await db.user_stats.find_one({"user_id": user_id}, {"_id": 0}) or {}
+
+    total = stats.get('total', 0)
+    first_day = (datetime.now(timezone.utc) - timedelta(days=days - 1)).date().isoformat()
+    activity = {
+        day: count
+        for day, count in sorted(stats.get('days', {}).items())
+        if day >= first_day
+    }
+    results = {name: 0 for name in CLASSIFICATIONS}
+    results.update(stats.get('results', {}))
+    return {
+        "total": total,
+        "results": results,
+        "average_confidence": round(stats.get('confidence_sum', 0) / total, 2) if total else 0.0,
+        "activity": activity,
+    }
+
+
+def verdict_correction(verification: dict, analysis: dict) -> Optional[UpdateOne]:
+    """Counter update for a stored verification whose verdict was re-analyzed.
+
+    Only applies when the counters already include the verification: they
+    were backfilled, or it was inserted after tracking started. Otherwise the
+    one-off backfill will count the new verdict itself.
+    """
+    old_result = _classification(verification['result'])
+    new_result = _classification(analysis['result'])
+    increments = {}
+    if old_result != new_result:
+        increments[f"results.{old_result}"] = -1
+        increments[f"results.{new_result}"] = 1
+    delta = analysis['confidence'] - verification['confidence']
+    if delta:
+        increments["confidence_sum"] = delta
+    if not increments or not verification.get('user_id'):
+        return None
+    return UpdateOne(
+        {
+            "user_id": verification['user_id'],
+            "$or": [
+                {"backfilled": True},
+                {"tracking_since": {"$lte": verification['timestamp']}},
+            ],
+        },
+        {"$inc": increments}
+    )
@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+slow_logger = logging.getLogger("truthguard.slow_requests")
+
+
+def configure_slow_log(path: str) -> None:
+    """Also write slow requests, one JSON object per line, to `path`"""
+    path = os.path.abspath(path)
+    for handler in slow_logger.handlers:
+        if isinstance(handler, logging.FileHandler) and handler.baseFilename == path:
+            return
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    slow_logger.addHandler(handler)
+
+
+class RequestTiming:
+    """Accumulated stage durations (ms) for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+
+    def add(self, name: str, duration_ms: float) -> None:
+        # Repeated stages (several Mongo reads, say) add up under one name
+        self.spans[name] = self.spans.get(name, 0.0) + duration_ms
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def header(self) -> str:
+        entries = [f"{name};dur={duration:.1f}" for name, duration in self.spans.items()]
+        entries.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a stage of the current request; a no-op outside a request"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, (time.perf_counter() - start) * 1000)
+
+
+class ServerTimingMiddleware:
+    """Emits the per-stage breakdown as a Server-Timing header.
+
+    Requests slower than `slow_ms` are written with their breakdown to the
+    truthguard.slow_requests logger, sampled at `sample_rate`.
+    """
+
+    def __init__(self, app: ASGIApp, slow_ms: float = 2000.0, sample_rate: float = 1.0) -> None:
+        self.app = app
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status_code = 500
+        event_stream = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, event_stream
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("server-timing", timing.header())
+                event_stream = headers.get("content-type", "").startswith("text/event-stream")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            total = timing.elapsed_ms()
+            # Event streams stay open by design and are never "slow"
+            if total >= self.slow_ms and not event_stream and random.random() < self.sample_rate:
+                slow_logger.warning(json.dumps({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "total_ms": round(total, 1),
+                    "spans_ms": {name: round(duration, 1) for name, duration in timing.spans.items()},
+                }))
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional, token counts are then estimated
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Per-message framing tokens in the chat format, and the reply primer
+MESSAGE_OVERHEAD = 4
+REPLY_OVERHEAD = 3
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARK = "\n\n[truncated]"
+
+
+class PromptTooLarge(Exception):
+    def __init__(self, tokens: int, budget: int):
+        super().__init__(f"Prompt of {tokens} tokens exceeds the budget of {budget}")
+        self.tokens = tokens
+        self.budget = budget
+
+
+# Encodings loaded so far, by model. Failures are not cached, so a later
+# call tries again
+_encodings: Dict[str, object] = {}
+_load_attempts: Dict[str, float] = {}
+LOAD_RETRY_INTERVAL = 60.0
+
+
+def load_encoding(model: str):
+    """The encoding for `model`; blocks while it is downloaded on first use"""
+    if model not in _encodings:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        _encodings[model] = encoding
+    return _encodings[model]
+
+
+def _try_load(model: str) -> None:
+    try:
+        load_encoding(model)
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, estimating token counts: {str(e)}")
+
+
+async def preload_encoding(model: str) -> None:
+    if tiktoken is not None:
+        await asyncio.get_running_loop().run_in_executor(None, load_encoding, model)
+
+
+def _encoding(model: str):
+    encoding = _encodings.get(model)
+    if encoding is None and tiktoken is not None:
+        # Counts are estimated until the encoding is loaded, which never
+        # happens on the event loop
+        now = time.monotonic()
+        if now - _load_attempts.get(model, -LOAD_RETRY_INTERVAL) >= LOAD_RETRY_INTERVAL:
+            _load_attempts[model] = now
+            try:
+                asyncio.get_running_loop().run_in_executor(None, _try_load, model)
+            except RuntimeError:
+                # No event loop (scripts): load in place
+                _try_load(model)
+                encoding = _encodings.get(model)
+    return encoding
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, limit: int, model: str = "gpt-4o-mini") -> str:
+    if limit <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:limit * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    return encoding.decode(tokens[:limit]) if len(tokens) > limit else text
+
+
+def count_message_tokens(messages: List[dict], model: str = "gpt-4o-mini") -> int:
+    return sum(count_tokens(message.get("content") or "", model) + MESSAGE_OVERHEAD for message in messages) + REPLY_OVERHEAD
+
+
+def fit_messages(messages: List[dict], budget: int, model: str = "gpt-4o-mini", truncate: bool = True) -> List[dict]:
+    """Messages whose prompt fits in `budget` tokens.
+
+    Over budget, the last user message is cut down to fit (keeping its
+    beginning), or PromptTooLarge is raised when `truncate` is off or the
+    rest of the prompt alone is already too large.
+    """
+    total = count_message_tokens(messages, model)
+    if budget <= 0 or total <= budget:
+        return messages
+    last_user = max((i for i, message in enumerate(messages) if message.get("role") == "user"), default=None)
+    if not truncate or last_user is None:
+        raise PromptTooLarge(total, budget)
+    content = messages[last_user].get("content") or ""
+    available = budget - (total - count_tokens(content, model)) - count_tokens(TRUNCATION_MARK, model)
+    if available <= 0:
+        raise PromptTooLarge(total, budget)
+    fitted = list(messages)
+    fitted[last_user] = dict(messages[last_user], content=truncate_to_tokens(content, available, model) + TRUNCATION_MARK)
+    return fitted
+
+
+_scope: ContextVar[Tuple[str, Optional[str]]] = ContextVar("token_scope", default=("other", None))
+
+
+@contextmanager
+def token_scope(route: str, user_id: Optional[str] = None) -> Iterator[None]:
+    """Attribute LLM token usage inside the block to `route` and `user_id`"""
+    token = _scope.set((route, user_id))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def _empty() -> Dict[str, int]:
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "truncated": 0}
+
+
+class TokenLedger:
+    """Token usage per route and per user for this worker.
+
+    Totals since start are kept in memory for /api/admin/metrics; increments
+    are flushed periodically into the token_usage collection, one document
+    per UTC day, route and user.
+    """
+
+    def __init__(self, max_users: int = 10000):
+        self.routes: Dict[str, Dict[str, int]] = {}
+        self.users: Dict[str, Dict[str, int]] = {}
+        self.max_users = max_users
+        self._pending: Dict[Tuple[str, str, str], Dict[str, int]] = {}
+
+    def _add(self, field: str, amount: int) -> None:
+        route, user_id = _scope.get()
+        counters = [self.routes.setdefault(route, _empty())]
+        if user_id is not None and (user_id in self.users or len(self.users) < self.max_users):
+            counters.append(self.users.setdefault(user_id, _empty()))
+        day = datetime.now(timezone.utc).date().isoformat()
+        counters.append(self._pending.setdefault((day, route, user_id or "-"), _empty()))
+        for counter in counters:
+            counter[field] += amount
+
+    def record(self, usage) -> None:
+        """Count one completion's `usage` (an OpenAI CompletionUsage, or None)"""
+        self._add("calls", 1)
+        if usage is not None:
+            self._add("prompt_tokens", usage.prompt_tokens or 0)
+            self._add("completion_tokens", usage.completion_tokens or 0)
+
+    def record_truncation(self) -> None:
+        self._add("truncated", 1)
+
+    async def flush(self, db) -> None:
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        await db.token_usage.bulk_write([
+            UpdateOne(
+                {"day": day, "route": route, "user_id": user_id},
+                {"$inc": counts},
+                upsert=True
+            )
+            for (day, route, user_id), counts in pending.items()
+        ], ordered=False)
+
+    async def run(self, db, interval: float) -> None:
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.flush(db)
+                except Exception as e:
+                    logger.warning(f"Token usage flush failed: {str(e)}")
+        finally:
+            # Shutdown: keep what this worker counted since the last flush
+            await asyncio.shield(self.flush(db))
+
+    def stats(self, top_users: int = 20) -> dict:
+        users = sorted(
+            self.users.items(),
+            key=lambda item: item[1]["prompt_tokens"] + item[1]["completion_tokens"],
+            reverse=True
+        )[:top_users]
+        return {"routes": self.routes, "top_users": dict(users)}
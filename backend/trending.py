@@ -0,0 +1,314 @@
+import asyncio
+import hashlib
+import heapq
+import logging
+import re
+import time
+import unicodedata
+from collections import deque
+from functools import cached_property
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from bodies import LOOKUP_BATCH_SIZE, hydrate, load_bodies
+from normalize import canonical_url
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+URL_RE = re.compile(r"https?://\S+")
+NON_WORD_RE = re.compile(r"[^\w]+")
+STORY_WORDS = 40
+
+# Each sync re-reads this many seconds before the newest timestamp seen, for
+# rows committed after rows with later timestamps
+SYNC_OVERLAP = 30
+# Stored rows carry their story_key; bodies are only loaded for titles
+SYNC_FIELDS = {
+    "_id": 0, "id": 1, "story_key": 1, "content": 1, "content_hash": 1, "url": 1, "result": 1, "confidence": 1,
+    "timestamp": 1
+}
+
+# name -> (window length, bucket length) in seconds
+WINDOWS = {
+    "1h": (3600, 300),
+    "24h": (86400, 3600),
+}
+
+
+def story_key(content: str, url: Optional[str] = None) -> str:
+    """Stable key for a story: its canonical URL when given, else its normalized opening words"""
+    if url:
+        normalized = "url:" + canonical_url(url).lower()
+    else:
+        text = unicodedata.normalize("NFKC", content).lower()
+        text = NON_WORD_RE.sub(" ", URL_RE.sub(" ", text))
+        normalized = "text:" + " ".join(text.split()[:STORY_WORDS])
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+def story_title(content: str) -> str:
+    return content[:100] + "..." if len(content) > 100 else content
+
+
+def _parse_timestamp(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class WindowedCountMinSketch:
+    """Count-min sketch over a sliding window made of fixed-size time buckets.
+
+    Each bucket has its own sketch and `total` holds their sum, so an insert
+    touches `depth` counters twice and an estimate reads `depth` counters.
+    When a bucket falls out of the window it is subtracted from the total.
+    """
+
+    def __init__(self, window: int, bucket: int, width: int = 2048, depth: int = 4):
+        # numpy is imported on first use, keeping it out of module import time
+        import numpy as np
+        self.bucket = bucket
+        self.slots = window // bucket
+        self.width = width
+        self.depth = depth
+        self.buckets = np.zeros((self.slots, depth, width), dtype=np.int32)
+        self.bucket_ids = np.full(self.slots, -1, dtype=np.int64)
+        self.total = np.zeros((depth, width), dtype=np.int32)
+        self.current = -1
+        self._rows = np.arange(depth)
+
+    def indexes(self, key: str) -> "np.ndarray":
+        import numpy as np
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype=np.uint32) % self.width
+
+    def advance(self, now: float) -> bool:
+        """Expire buckets that left the window; True when anything expired"""
+        current = int(now // self.bucket)
+        if current <= self.current:
+            return False
+        self.current = current
+        expired = False
+        for slot in range(self.slots):
+            bucket_id = self.bucket_ids[slot]
+            if bucket_id >= 0 and bucket_id <= current - self.slots:
+                self.total -= self.buckets[slot]
+                self.buckets[slot] = 0
+                self.bucket_ids[slot] = -1
+                expired = True
+        return expired
+
+    def add(self, indexes: "np.ndarray", at: float, count: int = 1) -> bool:
+        bucket_id = int(at // self.bucket)
+        if bucket_id <= self.current - self.slots or bucket_id > self.current:
+            return False
+        slot = bucket_id % self.slots
+        if self.bucket_ids[slot] != bucket_id:
+            self.total -= self.buckets[slot]
+            self.buckets[slot] = 0
+            self.bucket_ids[slot] = bucket_id
+        self.buckets[slot, self._rows, indexes] += count
+        self.total[self._rows, indexes] += count
+        return True
+
+    def estimate(self, indexes: "np.ndarray") -> int:
+        return int(self.total[self._rows, indexes].min())
+
+
+class TopK:
+    """The K heaviest keys seen so far, with a lazily cleaned min-heap"""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.counts: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def offer(self, key: str, count: int) -> bool:
+        """Record a new estimate for key; True when key is (still) in the top K"""
+        if key in self.counts:
+            self.counts[key] = count
+            heapq.heappush(self._heap, (count, key))
+        elif len(self.counts) < self.k:
+            self.counts[key] = count
+            heapq.heappush(self._heap, (count, key))
+        else:
+            smallest, smallest_key = self._min()
+            if count <= smallest:
+                return False
+            del self.counts[smallest_key]
+            self.counts[key] = count
+            heapq.heappush(self._heap, (count, key))
+        if len(self._heap) > 4 * self.k:
+            self._rebuild()
+        return True
+
+    def _min(self) -> Tuple[int, str]:
+        while True:
+            count, key = self._heap[0]
+            if self.counts.get(key) == count:
+                return count, key
+            heapq.heappop(self._heap)
+
+    def _rebuild(self) -> None:
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def reset(self, counts: Dict[str, int]) -> None:
+        self.counts = {key: count for key, count in counts.items() if count > 0}
+        self._rebuild()
+
+
+class TrendingTracker:
+    """In-memory heavy-hitter ranking of submitted stories over sliding windows.
+
+    record() is O(1) per verification. Verifications inserted by other worker
+    processes are folded in by sync(), which reads documents from SYNC_OVERLAP
+    seconds before the newest one seen and skips those already counted.
+    Rows are counted by their stored story_key; content is loaded only for
+    stories that make the top K, for their titles.
+    """
+
+    def __init__(self, k: int = 50, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.top = {name: TopK(k) for name in WINDOWS}
+        self.stories: Dict[str, dict] = {}
+        self.cursor: Optional[str] = None
+        self._recorded = deque(maxlen=20000)
+        self._recorded_ids = set()
+
+    @cached_property
+    def sketches(self) -> Dict[str, WindowedCountMinSketch]:
+        # Allocated on first use, so numpy stays out of worker startup
+        return {
+            name: WindowedCountMinSketch(window, bucket, self.width, self.depth)
+            for name, (window, bucket) in WINDOWS.items()
+        }
+
+    def _advance(self, now: float) -> None:
+        for name, sketch in self.sketches.items():
+            if sketch.advance(now):
+                top = self.top[name]
+                top.reset({key: sketch.estimate(sketch.indexes(key)) for key in top.counts})
+        self._forget_stories()
+
+    def _forget_stories(self) -> None:
+        if len(self.stories) > 2 * sum(top.k for top in self.top.values()):
+            members = set()
+            for top in self.top.values():
+                members.update(top.counts)
+            self.stories = {key: story for key, story in self.stories.items() if key in members}
+
+    def seen(self, verification_id: Optional[str]) -> bool:
+        return verification_id in self._recorded_ids
+
+    def record(self, verification: dict) -> bool:
+        """Count one verification; False if this worker already counted it"""
+        verification_id = verification.get('id')
+        if verification_id in self._recorded_ids:
+            return False
+        if verification_id:
+            if len(self._recorded) == self._recorded.maxlen:
+                self._recorded_ids.discard(self._recorded[0])
+            self._recorded.append(verification_id)
+            self._recorded_ids.add(verification_id)
+
+        verified_at = _parse_timestamp(verification['timestamp'])
+        now = time.time()
+        self._advance(now)
+        # Clamp small clock skew between workers into the current bucket
+        at = min(verified_at.timestamp(), now)
+        key = verification.get('story_key') or story_key(verification['content'], verification.get('url'))
+        admitted = False
+        for name, sketch in self.sketches.items():
+            indexes = sketch.indexes(key)
+            if sketch.add(indexes, at):
+                admitted = self.top[name].offer(key, sketch.estimate(indexes)) or admitted
+
+        if admitted:
+            story = self.stories.get(key)
+            if story is None or story['last_seen'] <= verified_at:
+                content = verification.get('content')
+                self.stories[key] = {
+                    "key": key,
+                    # Filled in from content_hash after a sync batch
+                    "title": story_title(content) if content is not None else None,
+                    "content_hash": verification.get('content_hash'),
+                    "source": verification.get('url') or 'User Submission',
+                    "status": verification['result'],
+                    "confidence": verification['confidence'],
+                    "last_seen": verified_at,
+                }
+        return True
+
+    def ranking(self, window: str = "24h", limit: int = 20) -> List[dict]:
+        self._advance(time.time())
+        counts = self.top[window].counts
+        ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [
+            {**{field: value for field, value in self.stories[key].items() if field != "content_hash"}, "submissions": count}
+            for key, count in ranked
+            if key in self.stories and self.stories[key]['title'] is not None
+        ]
+
+    async def load(self, db) -> None:
+        """Seed the sketches from the largest window of stored verifications"""
+        longest = max(window for window, _ in WINDOWS.values())
+        since = (datetime.now(timezone.utc) - timedelta(seconds=longest)).isoformat()
+        await self._consume(db, {"timestamp": {"$gt": since}})
+
+    async def sync(self, db) -> List[dict]:
+        """Fold in verifications inserted since the last load or sync.
+
+        Returns those other workers stored since the last sync, with content.
+        """
+        if self.cursor is None:
+            await self.load(db)
+            return []
+        since = (_parse_timestamp(self.cursor) - timedelta(seconds=SYNC_OVERLAP)).isoformat()
+        return await hydrate(db, await self._consume(db, {"timestamp": {"$gt": since}}), ("content",))
+
+    async def _consume(self, db, query: dict) -> List[dict]:
+        cursor = db.verifications.find(query, SYNC_FIELDS).sort("timestamp", 1)
+        batch = []
+        recorded = []
+        async for verification in cursor:
+            if self.seen(verification.get('id')):
+                continue
+            batch.append(verification)
+            if len(batch) >= LOOKUP_BATCH_SIZE:
+                recorded += await self._record_batch(db, batch)
+                batch = []
+        recorded += await self._record_batch(db, batch)
+        return recorded
+
+    async def _record_batch(self, db, verifications: List[dict]) -> List[dict]:
+        # Rows stored before story_key existed need their content for the key
+        await hydrate(db, [verification for verification in verifications if 'story_key' not in verification], ("content",))
+        recorded = []
+        for verification in verifications:
+            if self.record(verification):
+                recorded.append(verification)
+            if self.cursor is None or verification['timestamp'] > self.cursor:
+                self.cursor = verification['timestamp']
+        untitled = [story for story in self.stories.values() if story['title'] is None]
+        if untitled:
+            texts = await load_bodies(db, (story['content_hash'] for story in untitled if story['content_hash']))
+            for story in untitled:
+                story['title'] = story_title(texts.get(story['content_hash'], ""))
+        return recorded
+
+    async def run(self, db, interval: float, on_new: Optional[Callable[[List[dict]], None]] = None) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                recorded = await self.sync(db)
+                if recorded and on_new is not None:
+                    on_new(recorded)
+            except Exception as e:
+                logger.warning(f"Trending sync failed: {str(e)}")
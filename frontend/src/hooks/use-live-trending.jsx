@@ -0,0 +1,31 @@
+import { useEffect, useRef } from 'react';
+import axios from 'axios';
+
+// Subscribes to /trending/live while mounted; `handlers` maps event names
+// ("trending", "verifications", "news", "headlines") to callbacks receiving parsed data.
+// EventSource reconnects by itself, including after a "resync".
+export function useLiveTrending(handlers) {
+  const handlersRef = useRef(handlers);
+  handlersRef.current = handlers;
+
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') {
+      return undefined;
+    }
+    const source = new EventSource(`${axios.defaults.baseURL}/trending/live`);
+    const listeners = ['trending', 'verifications', 'news', 'headlines'].map((name) => {
+      const listener = (event) => {
+        const handler = handlersRef.current[name];
+        if (handler) {
+          handler(JSON.parse(event.data));
+        }
+      };
+      source.addEventListener(name, listener);
+      return [name, listener];
+    });
+    return () => {
+      listeners.forEach(([name, listener]) => source.removeEventListener(name, listener));
+      source.close();
+    };
+  }, []);
+}
@@ -1,15 +1,58 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
-import { TrendingUp, Loader2, ExternalLink, Calendar } from 'lucide-react';
+import { TrendingUp, Loader2, ExternalLink, Calendar, Flame } from 'lucide-react';
 import { toast } from 'sonner';
 import { motion } from 'framer-motion';
 import { format } from 'date-fns';
+import { useLiveTrending } from '../hooks/use-live-trending';
+
+const TRENDING_LIMIT = 20;
+const TOP_LIMIT = 10;
+// The ranking is refetched at most this often while verifications stream in
+const TOP_REFRESH_MS = 30000;
 
 const Trending = () => {
   const [trending, setTrending] = useState([]);
   const [loading, setLoading] = useState(true);
   const [filter, setFilter] = useState('All');
+  const [top, setTop] = useState([]);
+  const topFetchedAt = useRef(0);
+  // Set once the live stream has delivered the feed, which is never older
+  const streamed = useRef(false);
+
+  const fetchTop = async () => {
+    topFetchedAt.current = Date.now();
+    try {
+      const response = await axios.get('/trending/top', { params: { window: '24h', limit: TOP_LIMIT } });
+      setTop(response.data);
+    } catch (error) {
+      console.error('Failed to load the trending ranking:', error);
+    }
+  };
 
+  // The live stream opens with the current feed, then pushes new verifications
+  useLiveTrending({
+    trending: (items) => {
+      streamed.current = true;
+      setTrending(items);
+      setLoading(false);
+    },
+    verifications: (items) => {
+      setTrending((current) => {
+        const ids = new Set(items.map((item) => item.id));
+        return [...[...items].reverse(), ...current.filter((item) => !ids.has(item.id))].slice(0, TRENDING_LIMIT);
+      });
+      if (Date.now() - topFetchedAt.current >= TOP_REFRESH_MS) {
+        fetchTop();
+      }
+    }
+  });
+
+  useEffect(() => {
+    fetchTop();
+  }, []);
+
+  // Loaded once up front, so the page does not depend on the stream connecting
   useEffect(() => {
     fetchTrending();
   }, []);
@@ -17,7 +60,9 @@ const Trending = () => {
   const fetchTrending = async () => {
     try {
       const response = await axios.get('/trending');
-      setTrending(response.data);
+      if (!streamed.current) {
+        setTrending(response.data);
+      }
     } catch (error) {
       toast.error('Failed to load trending news');
     } finally {
@@ -65,6 +110,32 @@ const Trending = () => {
           </p>
         </div>
 
+        {/* Most submitted stories */}
+        {top.length > 0 && (
+          <div className="glass rounded-2xl p-6 mb-10" data-testid="trending-top">
+            <div className="flex items-center space-x-2 mb-4">
+              <Flame className="w-6 h-6 text-orange-500" />
+              <h2 className="text-2xl font-bold text-gray-800">Most verified in the last 24 hours</h2>
+            </div>
+            <ol className="space-y-3">
+              {top.map((story, index) => (
+                <li key={story.key} className="flex items-center justify-between gap-4">
+                  <div className="flex items-center gap-3 min-w-0">
+                    <span className="text-lg font-bold text-gray-400 w-6">{index + 1}</span>
+                    <span className="font-semibold text-gray-800 truncate">{story.title}</span>
+                  </div>
+                  <div className="flex items-center gap-3 shrink-0">
+                    <span className="text-sm text-gray-600">{story.submissions} checks</span>
+                    <span className={`px-3 py-1 rounded-full text-xs font-bold border ${getStatusColor(story.status)}`}>
+                      {story.status}
+                    </span>
+                  </div>
+                </li>
+              ))}
+            </ol>
+          </div>
+        )}
+
         {/* Filter Buttons */}
         <div className="flex flex-wrap justify-center gap-3 mb-8">
           {['All', 'Real', 'Misleading', 'Fake'].map((status) => (
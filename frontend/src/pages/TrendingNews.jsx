@@ -5,6 +5,7 @@ import { toast } from 'sonner';
 import { motion } from 'framer-motion';
 import { format } from 'date-fns';
 import Footer from '../components/Footer';
+import { useLiveTrending } from '../hooks/use-live-trending';
 
 const TrendingNews = () => {
   const [news, setNews] = useState([]);
@@ -26,6 +27,39 @@ const TrendingNews = () => {
     fetchNews();
   }, [category]);
 
+  // Refreshed headlines are pushed as soon as any viewer's request refetches them
+  useLiveTrending({
+    news: (page) => {
+      if (page.category === category && page.page === 1) {
+        // Keep badges already shown for articles the page has no verdict for yet
+        setNews((current) => {
+          const known = new Map(current.filter((article) => article.verdict).map((article) => [article.url, article.verdict]));
+          return (page.articles || []).map((article) => (
+            article.verdict || !known.has(article.url) ? article : { ...article, verdict: known.get(article.url) }
+          ));
+        });
+      }
+    },
+    // Verdicts from the background headline verifier
+    headlines: (verdicts) => {
+      const byUrl = new Map(verdicts.map((item) => [item.url, item.verdict]));
+      setNews((current) => current.map((article) => (
+        byUrl.has(article.url) ? { ...article, verdict: byUrl.get(article.url) } : article
+      )));
+    }
+  });
+
+  const getVerdictColor = (result) => {
+    switch (result) {
+      case 'Real':
+        return 'bg-green-100 text-green-700 border-green-300';
+      case 'Fake':
+        return 'bg-red-100 text-red-700 border-red-300';
+      default:
+        return 'bg-orange-100 text-orange-700 border-orange-300';
+    }
+  };
+
   const fetchNews = async () => {
     setLoading(true);
     try {
@@ -133,6 +167,13 @@ const TrendingNews = () => {
                   )}
 
                   <div className="p-6">
+                    {/* Verdict */}
+                    {article.verdict && (
+                      <div className={`inline-flex items-center px-3 py-1 mb-3 rounded-full text-xs font-bold border ${getVerdictColor(article.verdict.result)}`}>
+                        {article.verdict.result} · {article.verdict.confidence.toFixed(0)}%
+                      </div>
+                    )}
+
                     {/* Title */}
                     <h3 className="text-lg font-bold text-gray-900 mb-3 line-clamp-3 group-hover:text-blue-600 transition-colors">
                       {article.title}
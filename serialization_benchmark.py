@@ -0,0 +1,107 @@
+"""Microbenchmark: per-request CPU for serializing the /history and /trending lists.
+
+"before" mirrors what FastAPI does with response_model: validate the raw Mongo
+documents into models, dump them in JSON mode, run jsonable_encoder and render
+with json.dumps. "after" is the trusted orjson path used by the endpoints now.
+
+Run from the repository root:  python serialization_benchmark.py [iterations]
+"""
+import json
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from responses import dumps  # noqa: E402
+from shared_cache import SharedBodyCache  # noqa: E402
+from server import TrendingNews, VerificationResult, build_trending  # noqa: E402
+
+
+def make_documents(count: int) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    evidence = "The claim is contradicted by multiple reputable sources. " * 12
+    content = "Breaking: officials confirm a surprising announcement about the economy. " * 6
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": str(uuid.uuid4()),
+            "content": content,
+            "url": f"https://example.com/articles/{i}",
+            "result": ("Real", "Fake", "Misleading")[i % 3],
+            "confidence": 42.0 + i % 50,
+            "evidence": evidence,
+            "timestamp": (now - timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def cpu_per_call(fn, iterations: int) -> float:
+    fn()  # warm up
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    history_docs = make_documents(100)
+    trending_docs = history_docs[:20]
+    history_adapter = TypeAdapter(List[VerificationResult])
+    trending_adapter = TypeAdapter(List[TrendingNews])
+
+    def history_before():
+        docs = [dict(d, timestamp=datetime.fromisoformat(d["timestamp"])) for d in history_docs]
+        models = history_adapter.validate_python(docs)
+        return json.dumps(jsonable_encoder(history_adapter.dump_python(models, mode="json"))).encode()
+
+    def history_after():
+        return dumps(history_docs)
+
+    def trending_before():
+        models = [
+            TrendingNews(
+                title=v["content"][:100] + "..." if len(v["content"]) > 100 else v["content"],
+                source=v.get("url") or "User Submission",
+                status=v["result"],
+                confidence=v["confidence"],
+                verified_at=datetime.fromisoformat(v["timestamp"]),
+            )
+            for v in trending_docs
+        ]
+        models = trending_adapter.validate_python(models)
+        return json.dumps(jsonable_encoder(trending_adapter.dump_python(models, mode="json"))).encode()
+
+    def trending_after():
+        return dumps(build_trending(trending_docs))
+
+    cache = SharedBodyCache(tempfile.mkdtemp())
+    cache.set("trending", trending_after(), ttl=60)
+
+    def trending_cached():
+        return cache.get("trending")
+
+    print(f"CPU per request, {iterations} iterations (microseconds)")
+    print(f"{'endpoint':<22}{'before':>10}{'after':>10}{'speedup':>10}")
+    for name, before, after in (
+        ("/api/history (100)", history_before, history_after),
+        ("/api/trending (20)", trending_before, trending_after),
+    ):
+        b = cpu_per_call(before, iterations)
+        a = cpu_per_call(after, iterations)
+        print(f"{name:<22}{b:>10.1f}{a:>10.1f}{b / a:>9.1f}x")
+    cached = cpu_per_call(trending_cached, iterations)
+    print(f"{'/api/trending cached':<22}{'':>10}{cached:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Startup-time benchmark for a backend worker.
+
+Each run starts a fresh interpreter (as a new uvicorn worker would) and
+measures importing server, building the app with create_app, then
+entering the lifespan, which opens and warms the Mongo, HTTP and LLM pools.
+It also lists which heavy modules were already imported before the first
+request.
+
+Run from the repository root:  python startup_benchmark.py [runs]
+"""
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent / "backend"
+HEAVY_MODULES = ("openai", "passlib", "requests", "pandas", "numpy")
+
+CHILD = """
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import server
+t1 = time.perf_counter()
+app = server.create_app()
+t2 = time.perf_counter()
+heavy = [m for m in %r if m in sys.modules]
+
+async def start_and_stop():
+    async with app.router.lifespan_context(app):
+        t3 = time.perf_counter()
+        loaded = [m for m in %r if m in sys.modules]
+    return t3, time.perf_counter(), loaded
+
+t3, t4, loaded = asyncio.run(start_and_stop())
+print(json.dumps({
+    "import": t1 - t0, "create_app": t2 - t1, "lifespan": t3 - t2, "shutdown": t4 - t3,
+    "heavy": heavy, "loaded": loaded
+}))
+""" % (HEAVY_MODULES, HEAVY_MODULES)
+
+
+def run_once() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results = [run_once() for _ in range(runs)]
+
+    print(f"Worker startup over {runs} fresh interpreters (milliseconds)")
+    print(f"{'phase':<28}{'median':>10}{'min':>10}{'max':>10}")
+    for phase, label in (
+        ("import", "import server"),
+        ("create_app", "create_app"),
+        ("lifespan", "lifespan startup (warm-up)"),
+        ("shutdown", "lifespan shutdown"),
+    ):
+        values = [r[phase] * 1000 for r in results]
+        print(f"{label:<28}{statistics.median(values):>10.1f}{min(values):>10.1f}{max(values):>10.1f}")
+    print(f"heavy modules loaded by import and create_app: {', '.join(results[-1]['heavy']) or 'none'}")
+    print(f"heavy modules loaded before first request: {', '.join(results[-1]['loaded']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
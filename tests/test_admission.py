@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, Lane, Overloaded
+
+
+def make_controller(queue_size: int = 5, deadline: float = 1.0) -> AdmissionController:
+    return AdmissionController(
+        [Lane("verify", 0, queue_size, deadline), Lane("chatbot", 1, queue_size, deadline)],
+        concurrency=1
+    )
+
+
+def test_higher_priority_lane_is_served_first():
+    async def scenario():
+        controller = make_controller()
+        gate = asyncio.Event()
+        order = []
+
+        async def job(lane, name, wait=False):
+            async def work():
+                if wait:
+                    await gate.wait()
+                order.append(name)
+            await controller.run(lane, None, work)
+
+        first = asyncio.ensure_future(job("verify", "first", wait=True))
+        await asyncio.sleep(0)
+        queued = [asyncio.ensure_future(job("chatbot", "chat")), asyncio.ensure_future(job("verify", "verify"))]
+        await asyncio.sleep(0)
+        assert controller.stats()["lanes"]["chatbot"]["waiting"] == 1
+        gate.set()
+        await asyncio.gather(first, *queued)
+        return order, controller
+
+    order, controller = asyncio.run(scenario())
+    assert order == ["first", "verify", "chat"]
+    assert controller.active == 0
+    assert controller.lanes["chatbot"].counts["admitted"] == 1
+
+
+def test_full_lane_is_shed_up_front():
+    async def scenario():
+        controller = make_controller(queue_size=1)
+        gate = asyncio.Event()
+        running = asyncio.ensure_future(controller.run("verify", None, gate.wait))
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(controller.run("verify", None, gate.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as shed:
+            await controller.run("verify", None, gate.wait)
+        gate.set()
+        await asyncio.gather(running, waiting)
+        return shed.value, controller
+
+    error, controller = asyncio.run(scenario())
+    assert error.lane == "verify" and error.retry_after >= 1
+    assert controller.lanes["verify"].counts["shed"] == 1
+    assert controller.active == 0
+
+
+def test_request_still_queued_at_its_deadline_times_out():
+    async def scenario():
+        controller = make_controller(deadline=0.05)
+        gate = asyncio.Event()
+        running = asyncio.ensure_future(controller.run("verify", None, gate.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await controller.run("chatbot", None, gate.wait)
+        gate.set()
+        await running
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.lanes["chatbot"].counts["timed_out"] == 1
+    assert not controller.lanes["chatbot"].waiting
+    assert controller.active == 0
@@ -0,0 +1,61 @@
+import asyncio
+
+from archive import find_history
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.offset = 0
+        self.count = None
+
+    def sort(self, field, direction):
+        self.rows = sorted(self.rows, key=lambda row: row[field], reverse=direction < 0)
+        return self
+
+    def skip(self, offset):
+        self.offset = offset
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    async def to_list(self, length):
+        return [dict(row) for row in self.rows[self.offset:self.offset + self.count]]
+
+
+class FakeCollection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def find(self, query, projection):
+        return FakeCursor([row for row in self.rows if row["user_id"] == query["user_id"]])
+
+    async def count_documents(self, query):
+        return len([row for row in self.rows if row["user_id"] == query["user_id"]])
+
+
+class FakeDB(dict):
+    def __getitem__(self, name):
+        return self.setdefault(name, FakeCollection([]))
+
+    async def list_collection_names(self):
+        return list(self)
+
+
+def row(i):
+    return {"id": f"v{i}", "user_id": "u", "timestamp": f"2025-01-{i:02d}T00:00:00+00:00"}
+
+
+def test_rows_being_archived_do_not_shorten_the_page():
+    # v3 and v4 were copied to the archive but not yet deleted from the hot collection
+    db = FakeDB(
+        verifications=FakeCollection([row(i) for i in range(3, 8)]),
+        verifications_archive_2025_01=FakeCollection([row(i) for i in range(1, 5)]),
+    )
+    pages = [asyncio.run(find_history(db, {"user_id": "u"}, skip, 3)) for skip in (0, 3)]
+    assert [[r["id"] for r in page] for page in pages] == [["v7", "v6", "v5"], ["v4", "v3", "v2"]]
+    assert [r["id"] for r in asyncio.run(find_history(db, {"user_id": "u"}, 0, 10))] == [
+        f"v{i}" for i in range(7, 0, -1)
+    ]
@@ -0,0 +1,61 @@
+import asyncio
+
+from bodies import BodyStore, hydrate, search_terms
+
+
+class FakeCollection:
+    """Just enough of a Motor collection for BodyStore and hydrate"""
+
+    def __init__(self):
+        self.documents = {}
+
+    async def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            key = operation._filter["_id"]
+            update = operation._doc
+            if key not in self.documents:
+                self.documents[key] = {"_id": key, **update.get("$setOnInsert", {})}
+            self.documents[key].update(update.get("$set", {}))
+
+    async def find(self, query):
+        for key in query["_id"]["$in"]:
+            if key in self.documents:
+                yield self.documents[key]
+
+
+class FakeDB:
+    def __init__(self):
+        self.bodies = FakeCollection()
+
+
+def test_round_trip_dedupes_and_compresses():
+    db = FakeDB()
+    store = BodyStore(db, compression="zstd", compress_min_size=64)
+    article = "The mayor announced a new bridge. " * 10
+    rows = asyncio.run(store.put([
+        {"id": "a", "content": article, "evidence": "Short evidence."},
+        {"id": "b", "content": article, "evidence": "Other evidence."},
+    ]))
+
+    assert "content" not in rows[0] and "evidence" not in rows[0]
+    assert rows[0]["content_hash"] == rows[1]["content_hash"]
+    assert len(db.bodies.documents) == 3
+    assert "zstd" in db.bodies.documents[rows[0]["content_hash"]]
+    assert db.bodies.documents[rows[0]["evidence_hash"]]["text"] == "Short evidence."
+
+    asyncio.run(hydrate(db, rows))
+    assert rows[0] == {"id": "a", "content": article, "evidence": "Short evidence."}
+    assert rows[1] == {"id": "b", "content": article, "evidence": "Other evidence."}
+
+
+def test_bodies_carry_search_words_once_and_rows_none():
+    db = FakeDB()
+    store = BodyStore(db, compression="zstd", compress_min_size=1)
+    content = "Vaccine trial results: the vaccine WORKS."
+    rows = asyncio.run(store.put([{"id": "a", "content": content}, {"id": "b", "content": content}]))
+    assert db.bodies.documents[rows[0]["content_hash"]]["terms"] == "vaccine trial results the works"
+    assert all(set(row) == {"id", "content_hash"} for row in rows)
+
+
+def test_search_words_are_capped():
+    assert len(search_terms(" ".join(f"w{i}" for i in range(5000))).split()) == 2000
@@ -0,0 +1,45 @@
+from faq import FAQ, FAQRouter
+
+router = FAQRouter(FAQ, threshold=0.7)
+
+
+def test_common_questions_are_answered_locally():
+    for message, intent in [
+        ("What does the confidence score mean?", "confidence"),
+        ("Do I need to log in?", "login_required"),
+        ("What is TruthGuard?", "what_is_truthguard"),
+        ("Hey!", "greeting"),
+    ]:
+        assert router.match(message)[0] == intent
+        assert router.answer(message) == router.answers[intent]
+
+
+def test_close_but_different_questions_go_to_the_llm():
+    # Both score above the threshold against "what does real mean"
+    for message in ("Is this real?", "what does real mean in physics"):
+        assert router.match(message)[1] >= router.threshold
+        assert router.answer(message) is None
+
+
+def test_unrelated_and_empty_messages_go_to_the_llm():
+    assert router.answer("Who won the football match yesterday?") is None
+    assert router.answer("?!") is None
+
+
+def test_follow_ups_go_to_the_llm_except_greetings_and_thanks():
+    history = [{"role": "user", "content": "Check this headline"}, {"role": "assistant", "content": "It is Fake."}]
+    assert router.answer("What does the confidence score mean?", history) is None
+    assert router.answer("thanks", history) == router.answers["thanks"]
+
+
+def test_threshold_and_stats():
+    strict = FAQRouter(FAQ, threshold=1.01)
+    assert strict.answer("hello") is None
+    assert router.answer("hello") is not None
+    stats = strict.stats()
+    assert stats["hits"] == 0 and stats["misses"] == 1
+
+
+def test_the_chat_widgets_opening_greeting_is_not_a_conversation():
+    history = [{"role": "assistant", "content": "Hi! I'm TruthGuard Assistant. Ask me anything!"}]
+    assert router.answer("Do I need to log in?", history) == router.answers["login_required"]
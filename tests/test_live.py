@@ -0,0 +1,56 @@
+import asyncio
+
+from bson import ObjectId
+
+from live import Broadcaster, EventRelay
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, field, direction):
+        self.documents.sort(key=lambda document: document[field], reverse=direction < 0)
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+
+class FakeCollection:
+    def __init__(self):
+        self.documents = []
+
+    async def insert_many(self, documents):
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        self.documents += documents
+
+    def find(self, query):
+        return FakeCursor([
+            document for document in self.documents
+            if document["_id"] > query["_id"]["$gt"] and document["worker"] != query["worker"]["$ne"]
+        ])
+
+
+def test_events_reach_watchers_of_other_workers_once():
+    async def scenario():
+        collection = FakeCollection()
+        here, there = Broadcaster(), Broadcaster()
+        sender, receiver = EventRelay(here, collection), EventRelay(there, collection)
+        watchers = [here.stream().__aiter__(), there.stream().__aiter__()]
+        for watcher in watchers:
+            await watcher.__anext__()
+
+        sender.publish("news", {"page": 1})
+        await sender.flush()
+        assert await sender.poll() == 0
+        assert await receiver.poll() == 1
+        assert await receiver.poll() == 0
+        return [await watcher.__anext__() for watcher in watchers]
+
+    assert asyncio.run(scenario()) == [b'event: news\ndata: {"page":1}\n\n'] * 2
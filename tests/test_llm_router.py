@@ -0,0 +1,38 @@
+import asyncio
+
+from llm_router import LLMRouter, ModelRoute
+
+
+class SlowClient:
+    """Answers after `delay` seconds"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.chat = self
+        self.completions = self
+
+    async def create(self, model, **kwargs):
+        await asyncio.sleep(self.delay)
+        return model
+
+
+def test_only_hedge_race_losers_are_recorded_when_cancelled():
+    async def scenario():
+        slow = ModelRoute("primary", "slow", SlowClient(10))
+        fast = ModelRoute("fallback", "fast", SlowClient(0))
+        slow.latencies.extend([0.01] * 20)
+        router = LLMRouter([slow, fast])
+        assert await router.complete(messages=[]) == "fast"
+        raced = len(slow.latencies)
+
+        # A caller going away cancels the call without a latency sample
+        slow.latencies.clear()
+        call = asyncio.ensure_future(router.complete(messages=[]))
+        await asyncio.sleep(0)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        return raced, len(slow.latencies)
+
+    raced, disconnected = asyncio.run(scenario())
+    assert raced == 21
+    assert disconnected == 0
@@ -0,0 +1,69 @@
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from middleware import CompressionMiddleware, ConditionalGetMiddleware
+
+ITEMS = [{"id": i, "title": f"Story {i}"} for i in range(100)]
+
+
+async def items(request):
+    return JSONResponse(ITEMS)
+
+
+async def stream(request):
+    return StreamingResponse(iter([b"a", b"b"]), media_type="text/plain")
+
+
+def make_client() -> TestClient:
+    app = Starlette(routes=[
+        Route("/api/trending", items),
+        Route("/api/trending/stream", stream),
+        Route("/api/other", items),
+    ])
+    app.add_middleware(ConditionalGetMiddleware, paths=("/api/trending",))
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    return TestClient(app)
+
+
+def test_matching_etag_gets_an_empty_304():
+    client = make_client()
+    first = client.get("/api/trending")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+    assert first.headers["cache-control"] == "no-cache"
+
+    revalidated = client.get("/api/trending", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+    changed = client.get("/api/trending", headers={"If-None-Match": 'W/"stale", "other"'})
+    assert changed.status_code == 200 and changed.json() == ITEMS
+
+
+def test_etag_is_the_same_across_encodings():
+    client = make_client()
+    plain = client.get("/api/trending", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/api/trending", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] == gzipped.headers["etag"]
+    assert client.get(
+        "/api/trending", headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["etag"]}
+    ).status_code == 304
+
+
+def test_authorized_responses_are_private_and_vary():
+    response = make_client().get("/api/trending", headers={"Authorization": "Bearer token"})
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert "Authorization" in response.headers["vary"]
+
+
+def test_other_paths_methods_and_streams_pass_through():
+    client = make_client()
+    assert "etag" not in client.get("/api/other").headers
+    assert "etag" not in client.post("/api/trending").headers
+    streamed = client.get("/api/trending/stream")
+    assert streamed.content == b"ab" and "etag" not in streamed.headers
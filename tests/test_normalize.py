@@ -0,0 +1,57 @@
+from normalize import canonical_url, normalize_content
+
+
+def test_boilerplate_lines_are_dropped():
+    text = "\n".join([
+        "The council approved the budget on Monday.",
+        "Share on Facebook",
+        "Advertisement",
+        "Read more: https://example.com/other",
+        "© 2024 Example News. All rights reserved.",
+        "We use cookies to improve your experience.",
+        "Photo credit: Jane Doe/Reuters",
+        "120 comments",
+    ])
+    assert normalize_content(text) == "The council approved the budget on Monday."
+
+
+def test_content_starting_like_boilerplate_is_kept():
+    lines = [
+        "Copyright office rules that AI-generated art cannot be protected.",
+        "Related: the senator resigned after the vote.",
+        "Copyright infringement suits rose 20% last year.",
+        "Advertisement spending fell sharply in the second quarter.",
+        "Share prices of the company doubled overnight.",
+        "See also the earlier statement from the ministry.",
+    ]
+    text = "\n".join(lines)
+    assert normalize_content(text) == text
+
+
+def test_boilerplate_in_the_middle_keeps_both_paragraphs():
+    text = "First paragraph of the story.\nAdvertisement\nCopyright infringement suits rose 20% last year."
+    assert normalize_content(text) == "First paragraph of the story.\nCopyright infringement suits rose 20% last year."
+
+
+def test_whitespace_nfkc_and_zero_width():
+    assert normalize_content("Ｔｈｅ  mayor​   spoke.\n\n\n  Then   left.") == "The mayor spoke.\nThen left."
+
+
+def test_repeated_sentences_are_removed_but_short_ones_kept():
+    text = "The mayor announced a new budget today. Yes. Yes.\nThe mayor announced a new budget today!"
+    assert normalize_content(text) == "The mayor announced a new budget today. Yes. Yes."
+
+
+def test_symbol_runs_collapse_and_ellipses_stay():
+    assert normalize_content("Wow!!!!!! 🔥🔥🔥 wait...") == "Wow! 🔥 wait..."
+
+
+def test_urls_in_text_lose_tracking_parameters():
+    text = "Source: https://News.example.com/a/?utm_source=x&id=5&fbclid=abc#top."
+    assert normalize_content(text) == "Source: https://news.example.com/a?id=5."
+
+
+def test_canonical_url_keeps_host():
+    assert canonical_url("https://www.example.com:443/story/?b=2&a=1&utm_medium=x") == "https://www.example.com/story?a=1&b=2"
+    assert canonical_url("http://example.com:8080/") == "http://example.com:8080/"
+    assert canonical_url("not a url") == "not a url"
@@ -0,0 +1,14 @@
+from server import build_trending, public_verifications
+
+
+def test_trending_and_history_serialize_a_row_the_same_way():
+    row = {
+        "id": "v1", "user_id": "u", "content": "Moon made of cheese", "url": None, "result": "Fake",
+        "confidence": 90.0, "evidence": "No.", "timestamp": "2025-03-01T12:00:00.123456+00:00",
+    }
+    history = public_verifications([row])[0]
+    trending = build_trending([row])[0]
+    assert trending["verified_at"] == history["timestamp"] == "2025-03-01T12:00:00.123456Z"
+    assert (trending["id"], trending["status"], trending["confidence"]) == (
+        history["id"], history["result"], history["confidence"]
+    )
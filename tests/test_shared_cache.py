@@ -0,0 +1,25 @@
+import asyncio
+import os
+
+from shared_cache import LOCK_SUFFIX, SharedBodyCache, default_cache_dir
+
+
+def test_sweep_deletes_expired_entries_and_their_locks(tmp_path):
+    cache = SharedBodyCache(str(tmp_path))
+
+    async def fill():
+        return b"body"
+
+    asyncio.run(cache.get_or_fill("fresh", 60, fill))
+    asyncio.run(cache.get_or_fill("expired", -60, fill))
+    assert len(os.listdir(tmp_path)) == 4
+
+    assert cache.sweep(stale_for=30) == 2
+    assert cache.get("fresh") == b"body"
+    fresh = os.path.basename(cache._path("fresh"))
+    assert sorted(os.listdir(tmp_path)) == [fresh, fresh + LOCK_SUFFIX]
+
+
+def test_default_directory_is_namespaced_by_database():
+    assert default_cache_dir("truthguard") != default_cache_dir("truthguard_test")
+    assert os.sep not in os.path.basename(default_cache_dir("../etc"))
@@ -0,0 +1,61 @@
+import time
+from datetime import datetime, timezone
+
+from trending import TopK, TrendingTracker, WindowedCountMinSketch, story_key
+
+
+def test_sketch_never_underestimates_and_expires_old_buckets():
+    sketch = WindowedCountMinSketch(window=60, bucket=10, width=64, depth=4)
+    sketch.advance(1000)
+    counts = {f"story-{i}": i % 7 + 1 for i in range(200)}
+    for key, count in counts.items():
+        assert sketch.add(sketch.indexes(key), 1000, count)
+    for key, count in counts.items():
+        assert sketch.estimate(sketch.indexes(key)) >= count
+
+    assert sketch.advance(1000 + 60)
+    assert sketch.estimate(sketch.indexes("story-1")) == 0
+    # Outside the window, and in the future
+    assert not sketch.add(sketch.indexes("late"), 1000)
+    assert not sketch.add(sketch.indexes("early"), 1000 + 70)
+
+
+def test_top_k_keeps_the_heaviest_keys():
+    top = TopK(3)
+    for key, count in [("a", 1), ("b", 5), ("c", 2), ("d", 4), ("e", 1), ("a", 6)]:
+        top.offer(key, count)
+    assert set(top.counts) == {"a", "b", "d"}
+    assert not top.offer("f", 3)
+    top.reset({"a": 0, "b": 2, "d": 1})
+    assert top.counts == {"b": 2, "d": 1}
+
+
+def test_story_key_ignores_case_punctuation_and_fragments():
+    assert story_key("Mayor RESIGNS!  Today", None) == story_key("mayor resigns today", None)
+    assert story_key("anything", "https://Example.com/a/#top") == story_key("other", "https://example.com/a")
+
+
+def test_tracker_ranks_by_submissions_and_counts_each_row_once():
+    tracker = TrendingTracker(k=5)
+    now = datetime.fromtimestamp(time.time(), timezone.utc).isoformat()
+
+    def verification(i, content):
+        return {"id": f"v{i}", "content": content, "url": None, "result": "Fake", "confidence": 90.0, "timestamp": now}
+
+    rows = [verification(i, "Moon made of cheese") for i in range(3)] + [verification(3, "Sun rises in the west")]
+    for row in rows:
+        assert tracker.record(row)
+    assert not tracker.record(rows[0])
+
+    ranking = tracker.ranking("1h")
+    assert [(story["title"], story["submissions"]) for story in ranking] == [
+        ("Moon made of cheese", 3), ("Sun rises in the west", 1)
+    ]
+    assert "content_hash" not in ranking[0]
+
+
+def test_tracking_parameter_variants_are_one_story():
+    base = "https://example.com/news/moon-landing"
+    variants = [base, f"{base}?utm_source=twitter&utm_medium=social", f"{base}/?fbclid=abc123", f"{base}#comments"]
+    assert len({story_key("Moon landing", url) for url in variants}) == 1
+    assert story_key("Moon landing", f"{base}?id=7") != story_key("Moon landing", base)
@@ -0,0 +1,167 @@
+"""Replay captured traffic against a running backend.
+
+Reads the JSONL written by the backend's capture mode (CAPTURE_PATH) and
+re-issues each request at its original offset from the first one, divided
+by --speed, without waiting for earlier responses (open loop), so arrival
+bursts and gaps are reproduced. Requests captured with a bearer token are
+sent with one token for a replay user, registered at start unless --token
+is given.
+
+Reports latency percentiles per endpoint next to the captured ones, status
+codes, and how late requests were dispatched against the schedule.
+
+Run from the repository root:
+    python traffic_replay.py capture.jsonl --target http://localhost:8001 --speed 2
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+
+def load_capture(path: str, limit: Optional[int]) -> List[dict]:
+    records = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    records.sort(key=lambda record: record["ts"])
+    return records[:limit] if limit else records
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+async def replay_user_token(client: httpx.AsyncClient) -> str:
+    response = await client.post("/api/auth/register", json={
+        "email": f"replay-{uuid.uuid4().hex[:12]}@example.com",
+        "password": f"Replay-{uuid.uuid4().hex}-1!",
+        "name": "Replay"
+    })
+    response.raise_for_status()
+    return response.json()["token"]
+
+
+async def send(client: httpx.AsyncClient, record: dict, token: Optional[str]) -> dict:
+    headers = dict(record.get("headers") or {})
+    if record.get("auth") and token:
+        headers["Authorization"] = f"Bearer {token}"
+    url = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+    started = time.perf_counter()
+    request = client.build_request(record["method"], url, headers=headers, json=record.get("json"))
+    try:
+        # Raw bytes: the body is downloaded in full but left encoded
+        response = await client.send(request, stream=True)
+        try:
+            async for _ in response.aiter_raw():
+                pass
+        finally:
+            await response.aclose()
+        status = response.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    return {"status": status, "latency": (time.perf_counter() - started) * 1000}
+
+
+async def replay(records: List[dict], target: str, speed: float, token: Optional[str], timeout: float) -> List[dict]:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+        if token is None and any(record.get("auth") for record in records):
+            token = await replay_user_token(client)
+
+        first = records[0]["ts"]
+        start = time.perf_counter()
+        tasks = []
+        for record in records:
+            due = (record["ts"] - first) / speed
+            delay = due - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lag = (time.perf_counter() - start - due) * 1000
+            tasks.append((record, lag, asyncio.create_task(send(client, record, token))))
+
+        results = []
+        for record, lag, task in tasks:
+            result = await task
+            results.append(dict(
+                result,
+                endpoint=record.get("endpoint") or f"{record['method']} {record['path']}",
+                captured=record.get("duration_ms"),
+                lag=lag
+            ))
+        return results
+
+
+def report(results: List[dict], elapsed: float) -> dict:
+    by_endpoint: Dict[str, List[dict]] = defaultdict(list)
+    for result in results:
+        by_endpoint[result["endpoint"]].append(result)
+
+    summary = {"requests": len(results), "elapsed_s": round(elapsed, 2), "endpoints": {}}
+    print(f"{len(results)} requests in {elapsed:.1f}s")
+    print(f"{'endpoint':<28}{'n':>6}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'capt p50':>10}{'capt p99':>10}")
+    for endpoint, rows in sorted(by_endpoint.items(), key=lambda item: -len(item[1])):
+        latencies = [row["latency"] for row in rows]
+        captured = [row["captured"] for row in rows if row["captured"] is not None]
+        stats = {
+            "count": len(rows),
+            "p50_ms": percentile(latencies, 0.5),
+            "p90_ms": percentile(latencies, 0.9),
+            "p99_ms": percentile(latencies, 0.99),
+            "max_ms": max(latencies),
+            "captured_p50_ms": percentile(captured, 0.5) if captured else None,
+            "captured_p99_ms": percentile(captured, 0.99) if captured else None,
+            "status": dict(Counter(str(row["status"]) for row in rows)),
+        }
+        summary["endpoints"][endpoint] = stats
+        captured_cols = "".join(
+            f"{value:>10.1f}" if value is not None else f"{'-':>10}"
+            for value in (stats["captured_p50_ms"], stats["captured_p99_ms"])
+        )
+        print(f"{endpoint[:27]:<28}{len(rows):>6}{stats['p50_ms']:>9.1f}{stats['p90_ms']:>9.1f}"
+              f"{stats['p99_ms']:>9.1f}{stats['max_ms']:>9.1f}{captured_cols}")
+
+    statuses = Counter(str(result["status"]) for result in results)
+    lags = [result["lag"] for result in results]
+    summary["status"] = dict(statuses)
+    summary["dispatch_lag_ms"] = {"median": statistics.median(lags), "max": max(lags)}
+    print("status: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items())))
+    print(f"dispatch lag: median {statistics.median(lags):.1f}ms, max {max(lags):.1f}ms")
+    return summary
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", help="JSONL file written with CAPTURE_PATH")
+    parser.add_argument("--target", default="http://localhost:8001", help="base URL of the backend")
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression factor (2 = twice as fast)")
+    parser.add_argument("--token", help="bearer token for authenticated requests instead of a new replay user")
+    parser.add_argument("--limit", type=int, help="replay only the first N requests")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--json", help="also write the summary to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    records = load_capture(args.capture, args.limit)
+    if not records:
+        raise SystemExit("No requests in the capture")
+    started = time.perf_counter()
+    results = asyncio.run(replay(records, args.target, args.speed, args.token, args.timeout))
+    summary = report(results, time.perf_counter() - started)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()